@@ -0,0 +1,211 @@
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import datetime as dt
+from scipy.interpolate import griddata
+
+from mesh.ADCIRC_mesh.adcirc_mesh import AdcirMesh
+
+from meteo_data.hwind_data.hwind_data import HwindData
+from meteo_data.owiwind_data.owiwind_data import OWIwindData
+
+from output.meteo_writer import MeteoWriter
+
+from utilities.utilities import garratt_wind_stress
+
+from benchmarks.synthetic_inputs import (write_adcirc_mesh, write_owi_data, write_hwind_data)
+
+#Benchmarks of the forcing pipeline on synthetic inputs. Run from the repository root:
+#    python -m benchmarks.run_benchmarks --nodes 100000 1000000
+#Every stage is timed separately and projections are compared against the scipy griddata reference.
+
+START_TIME = dt.datetime(2005, 8, 26)
+
+STAGES = ("mesh load", "meteo parse", "interpolation", "stress", "write")
+
+
+#Stands in for InputFile, meteo data only needs the air density
+class BenchmarkInput:
+    def __init__(self, rho_air=1.15):
+        self.rho_air = rho_air
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+
+    def run(self, stage, function, *args):
+        start = time.perf_counter()
+
+        result = function(*args)
+
+        self.totals[stage] = self.totals.get(stage, 0.0) + time.perf_counter() - start
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+        return result
+
+
+#Max and RMS difference of (n_points, n_fields) arrays, per field
+def field_errors(result, reference):
+    difference = np.abs(result - reference)
+
+    return difference.max(axis=0), np.sqrt((difference**2).mean(axis=0))
+
+
+#Projections of every OWI snapshot against griddata on the snapshot grid points
+def owiwind_accuracy(meteo_data, grid_coord_spherical):
+    errors = []
+
+    for owiwind_snapshot in meteo_data.owiwind_snapshots:
+        lon_grid, lat_grid = np.meshgrid(owiwind_snapshot.get_lon_coord(), owiwind_snapshot.get_lat_coord())
+
+        source_points = np.column_stack((lon_grid.flatten(), lat_grid.flatten()))
+
+        fields = meteo_data.get_snapshot_fields(owiwind_snapshot)
+
+        reference = np.column_stack([
+            griddata(source_points, fields[:, field], grid_coord_spherical, fill_value=fill_value)
+            for field, fill_value in ((0, 1013.0), (1, 0.0), (2, 0.0))
+        ])
+
+        errors.append(field_errors(np.column_stack(meteo_data.interpolate_snapshot(owiwind_snapshot,
+                                                                                   grid_coord_spherical)), reference))
+
+    return ("p", "vx", "vy"), errors
+
+
+#Projections of every hwind file, in place and moved half way to the next storm eye, against griddata
+#on the (moved) hwind grid points
+def hwind_accuracy(meteo_data, grid_coord_spherical):
+    errors = []
+
+    for hwind_file, next_hwind_file in zip(meteo_data.hwind_files, meteo_data.hwind_files[1:] + [None]):
+        shifts = [(0.0, 0.0)]
+
+        if next_hwind_file is not None:
+            shifts.append((0.5 * (next_hwind_file.storm_center_lon - hwind_file.storm_center_lon),
+                           0.5 * (next_hwind_file.storm_center_lat - hwind_file.storm_center_lat)))
+
+        for d_lon, d_lat in shifts:
+            source_points = hwind_file.spherical_grid_point_coordinates + np.array([d_lon, d_lat])
+
+            reference = np.column_stack([
+                griddata(source_points, values, grid_coord_spherical, fill_value=0.0)
+                for values in (hwind_file.vx, hwind_file.vy)
+            ])
+
+            errors.append(
+                field_errors(meteo_data.interpolate_hwind_file(hwind_file, d_lon, d_lat, grid_coord_spherical),
+                             reference))
+
+    return ("vx", "vy"), errors
+
+
+def run_case(args, meteo_type, n_nodes, work_directory):
+    timer = StageTimer()
+
+    mesh_file_path = os.path.join(work_directory, "fort.14")
+    write_adcirc_mesh(mesh_file_path, n_nodes)
+
+    if meteo_type == "OWIWIND":
+        meteo_file_path = os.path.join(work_directory, "fort.22")
+        start_time, end_time = write_owi_data(meteo_file_path, args.owi_grid[0], args.owi_grid[1], args.snapshots,
+                                              START_TIME, args.snapshot_hours)
+    else:
+        meteo_file_path = os.path.join(work_directory, "hwind.22")
+        start_time, end_time = write_hwind_data(meteo_file_path, args.hwind_grid, args.snapshots, START_TIME,
+                                                args.snapshot_hours)
+
+    mesh = timer.run("mesh load", AdcirMesh, mesh_file_path)
+
+    if meteo_type == "OWIWIND":
+        meteo_data = timer.run("meteo parse", OWIwindData, meteo_file_path)
+    else:
+        meteo_data = timer.run("meteo parse", HwindData, meteo_file_path)
+
+    grid_coord_spherical = mesh.coordinates
+
+    input = BenchmarkInput()
+    meteo_writer = MeteoWriter(args.precision)
+
+    output_file_name = os.path.join(work_directory, "benchmark.meteo")
+
+    time_step = dt.timedelta(hours=args.snapshot_hours) / args.steps_per_snapshot
+
+    current_time = start_time
+    while current_time <= end_time:
+        wind_data = timer.run("interpolation", meteo_data.get_wind_data, input, current_time, grid_coord_spherical)
+
+        wind_stress_x, wind_stress_y = timer.run("stress", garratt_wind_stress, wind_data, input.rho_air)
+
+        timer.run("write", meteo_writer.write, output_file_name, wind_stress_x, wind_stress_y, wind_data[:, 2])
+
+        current_time += time_step
+
+    if args.skip_accuracy:
+        accuracy = None
+    elif meteo_type == "OWIWIND":
+        accuracy = owiwind_accuracy(meteo_data, grid_coord_spherical)
+    else:
+        accuracy = hwind_accuracy(meteo_data, grid_coord_spherical)
+
+    return timer, accuracy
+
+
+def report_case(meteo_type, n_nodes, timer, accuracy):
+    print("{} {} nodes".format(meteo_type, n_nodes))
+    print("    {:<16}{:>8}{:>14}{:>14}".format("stage", "calls", "total [s]", "per call [s]"))
+
+    for stage in STAGES:
+        print("    {:<16}{:>8d}{:>14.4f}{:>14.6f}".format(stage, timer.counts[stage], timer.totals[stage],
+                                                         timer.totals[stage] / timer.counts[stage]))
+
+    if accuracy is not None:
+        field_names, errors = accuracy
+
+        max_errors = np.max([max_error for max_error, rms_error in errors], axis=0)
+        rms_errors = np.sqrt(np.mean([rms_error**2 for max_error, rms_error in errors], axis=0))
+
+        print("    accuracy against griddata over {} projections".format(len(errors)))
+
+        for field_name, max_error, rms_error in zip(field_names, max_errors, rms_errors):
+            print("    {:<16}max {:.3e}    rms {:.3e}".format(field_name, max_error, rms_error))
+
+    print("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the forcing pipeline on synthetic inputs.")
+
+    parser.add_argument("--meteo", nargs='+', default=["OWIWIND", "HWIND"], choices=["OWIWIND", "HWIND"])
+    parser.add_argument("--nodes", nargs='+', type=int, default=[100000], help="mesh sizes to benchmark")
+    parser.add_argument("--snapshots", type=int, default=4, help="number of OWI snapshots or hwind files")
+    parser.add_argument("--snapshot-hours", type=int, default=3, help="hours between snapshots")
+    parser.add_argument("--steps-per-snapshot", type=int, default=4, help="output steps between snapshots")
+    parser.add_argument("--owi-grid", nargs=2, type=int, default=[221, 161], help="OWI grid size n_lon n_lat")
+    parser.add_argument("--hwind-grid", type=int, default=159, help="hwind grid size")
+    parser.add_argument("--precision", type=int, default=None, help="output precision")
+    parser.add_argument("--skip-accuracy", action="store_true", help="skip comparison against griddata")
+    parser.add_argument("--work-directory", default=None, help="directory for synthetic inputs and outputs")
+
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        for meteo_type in args.meteo:
+            if args.work_directory is None:
+                with tempfile.TemporaryDirectory() as work_directory:
+                    timer, accuracy = run_case(args, meteo_type, n_nodes, work_directory)
+            else:
+                work_directory = os.path.join(args.work_directory, "{}_{}".format(meteo_type, n_nodes))
+                os.makedirs(work_directory, exist_ok=True)
+
+                timer, accuracy = run_case(args, meteo_type, n_nodes, work_directory)
+
+            report_case(meteo_type, n_nodes, timer, accuracy)
+
+
+if __name__ == "__main__":
+    main()
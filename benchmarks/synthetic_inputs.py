@@ -0,0 +1,167 @@
+import os
+import numpy as np
+import datetime as dt
+
+#Synthetic storm: a vortex moving north-west across the Gulf of Mexico
+STORM_START_LON = -88.0
+STORM_START_LAT = 23.0
+STORM_SPEED_LON = -0.25  #degrees per hour
+STORM_SPEED_LAT = 0.15  #degrees per hour
+STORM_P_CENTRAL = 950.0  #mb
+STORM_VMAX = 50.0  #m/s
+STORM_RMAX = 0.4  #degrees
+
+
+def storm_center(hours):
+    return STORM_START_LON + STORM_SPEED_LON * hours, STORM_START_LAT + STORM_SPEED_LAT * hours
+
+
+#Rankine-like vortex pressure and velocity at lon/lat points for a storm centred at (center_lon, center_lat)
+def storm_fields(lon, lat, center_lon, center_lat):
+    d_lon = lon - center_lon
+    d_lat = lat - center_lat
+
+    r = np.hypot(d_lon, d_lat) + 1.0e-6
+
+    p = STORM_P_CENTRAL + (1013.0 - STORM_P_CENTRAL) * np.exp(-STORM_RMAX / r)
+
+    speed = STORM_VMAX * np.where(r < STORM_RMAX, r / STORM_RMAX, np.sqrt(STORM_RMAX / r))
+
+    vx = -speed * d_lat / r
+    vy = speed * d_lon / r
+
+    return p, vx, vy
+
+
+#ADCIRC fort.14 with n_nodes scattered nodes in the given lon/lat box and about 2 triangles per node
+def write_adcirc_mesh(file_path, n_nodes, lon_range=(-98.0, -80.0), lat_range=(18.0, 31.0), seed=0):
+    rng = np.random.default_rng(seed)
+
+    lon = rng.uniform(lon_range[0], lon_range[1], n_nodes)
+    lat = rng.uniform(lat_range[0], lat_range[1], n_nodes)
+    bath = rng.uniform(1.0, 3000.0, n_nodes)
+
+    #Connectivity only has to be valid for the reader, nodes are not required to form a conforming mesh
+    n_elements = 2 * n_nodes
+    element_nodes = (np.arange(0, n_elements)[:, np.newaxis] // 2 + np.array([0, 1, 2])) % n_nodes + 1
+
+    with open(file_path, "w") as mesh_file:
+        mesh_file.write("synthetic mesh\n")
+        mesh_file.write("{} {}\n".format(n_elements, n_nodes))
+
+        np.savetxt(mesh_file, np.column_stack((np.arange(1, n_nodes + 1), lon, lat, bath)),
+                   fmt="%d %.10f %.10f %.4f")
+
+        np.savetxt(mesh_file, np.column_stack((np.arange(1, n_elements + 1), np.full(n_elements, 3), element_nodes)),
+                   fmt="%d")
+
+        mesh_file.write("0 = Number of open boundaries\n")
+
+
+def write_owi_block(data_file, values):
+    n_full_lines = values.shape[0] // 8
+
+    np.savetxt(data_file, values[:n_full_lines * 8].reshape((n_full_lines, 8)), fmt="%10.4f", delimiter='')
+
+    if values.shape[0] > n_full_lines * 8:
+        data_file.write(''.join("%10.4f" % value for value in values[n_full_lines * 8:]) + '\n')
+
+
+#OWI input file <file_path> with basin pressure (<file_path>1) and velocity (<file_path>2) files.
+#The basin grid has n_lon x n_lat points and n_snapshots snapshots every time_step_hours.
+def write_owi_data(file_path, n_lon, n_lat, n_snapshots, start_time, time_step_hours=1,
+                   lon_range=(-100.0, -78.0), lat_range=(16.0, 32.0)):
+    d_lon = (lon_range[1] - lon_range[0]) / (n_lon - 1)
+    d_lat = (lat_range[1] - lat_range[0]) / (n_lat - 1)
+
+    #OWI headers store spacing with 4 decimals, grid is built from the rounded values
+    d_lon = round(d_lon, 4)
+    d_lat = round(d_lat, 4)
+
+    lon_grid, lat_grid = np.meshgrid(lon_range[0] + d_lon * np.arange(0, n_lon),
+                                     lat_range[0] + d_lat * np.arange(0, n_lat))
+
+    end_time = start_time + dt.timedelta(hours=time_step_hours * (n_snapshots - 1))
+
+    with open(file_path, "w") as meteo_input_file:
+        meteo_input_file.write("1 number of fields\n0 skip\n1.0 wind multiplicator\n")
+
+    with open(file_path + '1', "w") as pressure_file, open(file_path + '2', "w") as velocity_file:
+        header = "Oceanweather WIN/PRE Format                            {}     {}\n".format(
+            start_time.strftime('%Y%m%d%H'), end_time.strftime('%Y%m%d%H'))
+
+        pressure_file.write(header)
+        velocity_file.write(header)
+
+        for snapshot in range(0, n_snapshots):
+            hours = time_step_hours * snapshot
+            time = start_time + dt.timedelta(hours=hours)
+
+            snapshot_header = "iLat={:4d}iLong={:4d}DX={:6.4f}DY={:6.4f}SWLat={:8.5f}SWLon={:8.4f}DT={}\n".format(
+                n_lat, n_lon, d_lon, d_lat, lat_range[0], lon_range[0], time.strftime('%Y%m%d%H%M'))
+
+            p, vx, vy = storm_fields(lon_grid.ravel(), lat_grid.ravel(), *storm_center(hours))
+
+            pressure_file.write(snapshot_header)
+            write_owi_block(pressure_file, p)
+
+            velocity_file.write(snapshot_header)
+            write_owi_block(velocity_file, vx)
+            write_owi_block(velocity_file, vy)
+
+    return start_time, end_time
+
+
+#HWind input file <file_path> listing n_files storm-centred HWind grids of n_grid x n_grid points,
+#one every time_step_hours. Grids are written into the directory of the input file.
+def write_hwind_data(file_path, n_grid, n_files, start_time, time_step_hours=3, dx_dy=6.0):
+    hwind_root = os.path.dirname(os.path.abspath(file_path))
+
+    x_coordinates = dx_dy * (np.arange(0, n_grid) - (n_grid - 1) / 2.0)
+
+    with open(file_path, "w") as meteo_input_file:
+        meteo_input_file.write("synthetic hwind data\n1.0\nspecifiedPc\n")
+
+        for hwind_file_id in range(0, n_files):
+            hours = time_step_hours * hwind_file_id
+            time = start_time + dt.timedelta(hours=hours)
+
+            center_lon, center_lat = storm_center(hours)
+
+            hwind_file_name = "hwind_{}.dat".format(time.strftime('%Y_%m%d_%H%M'))
+
+            meteo_input_file.write("{} {} {} {}\n".format(hwind_file_id, STORM_P_CENTRAL, 1.0, hwind_file_name))
+
+            lon_coordinates = center_lon + x_coordinates / (111.0 * np.cos(np.radians(center_lat)))
+            lat_coordinates = center_lat + x_coordinates / 111.0
+
+            with open(os.path.join(hwind_root, hwind_file_name), "w") as hwind_file:
+                hwind_file.write(" SURFACE WIND COMPONENTS\n")
+                hwind_file.write(" DX=DY= {:.5f} KILOMETERS.\n".format(dx_dy))
+                hwind_file.write(
+                    " STORM CENTER LOCALE IS {:.4f} EAST LONGITUDE and {:.4f} NORTH LATITUDE ... STORM CENTER IS AT "
+                    "(X,Y)=(0,0)\n".format(center_lon, center_lat))
+
+                for label, coordinates in (("X COORDINATES (KILOMETERS)", x_coordinates),
+                                           ("Y COORDINATES (KILOMETERS)", x_coordinates),
+                                           ("LONGITUDE COORDINATES (DEGREES)", lon_coordinates),
+                                           ("LATITUDE COORDINATES (DEGREES)", lat_coordinates)):
+                    hwind_file.write(" {}\n {}\n".format(label, n_grid))
+
+                    for start in range(0, n_grid, 8):
+                        hwind_file.write(' '.join("{:.4f}".format(value) for value in coordinates[start:start + 8]))
+                        hwind_file.write('\n')
+
+                hwind_file.write(" SURFACE WIND COMPONENTS (U,V) (METERS/SECOND)\n {} {}\n".format(n_grid, n_grid))
+
+                lon_grid, lat_grid = np.meshgrid(lon_coordinates, lat_coordinates)
+
+                p, vx, vy = storm_fields(lon_grid, lat_grid, center_lon, center_lat)
+
+                for j in range(0, n_grid):
+                    for start in range(0, n_grid, 5):
+                        hwind_file.write(' '.join("({:.2f},{:.2f})".format(vx[j, i], vy[j, i])
+                                                  for i in range(start, min(start + 5, n_grid))))
+                        hwind_file.write('\n')
+
+    return start_time, start_time + dt.timedelta(hours=time_step_hours * (n_files - 1))
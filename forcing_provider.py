@@ -0,0 +1,130 @@
+import datetime as dt
+
+from input_file import MeshType
+from input_file import MeteoDataType
+
+from mesh.ADCIRC_mesh.adcirc_mesh import AdcirMesh
+from mesh.Meta_mesh.meta_mesh import MetaMesh
+
+from meteo_data.hwind_data.hwind_data import HwindData
+from meteo_data.owiwind_data.owiwind_data import OWIwindData
+from meteo_data.holland_data.holland_data import HollandData
+
+from utilities.utilities import garratt_wind_stress
+
+
+def load_mesh(input, input_cache=None):
+    if input.mesh_type == MeshType.ADCIRC:
+        return AdcirMesh(input.mesh_file_path, input_cache)
+    elif input.mesh_type == MeshType.Meta:
+        return MetaMesh(input.mesh_file_path, input_cache)
+
+
+def load_meteo_data(input, input_cache=None):
+    if input.meteo_data_type == MeteoDataType.HWIND:
+        return HwindData(input.raw_meteo_input_file, input_cache=input_cache, dtype=input.field_dtype)
+    elif input.meteo_data_type == MeteoDataType.OWIWIND:
+        return OWIwindData(input.raw_meteo_input_file, input_cache=input_cache, dtype=input.field_dtype)
+    elif input.meteo_data_type == MeteoDataType.HOLLAND:
+        return HollandData(input.raw_meteo_input_file, dtype=input.field_dtype)
+
+
+#Output times from start_time to end_time (inclusive) every interval seconds
+def get_output_times(start_time, end_time, interval):
+    output_times = []
+
+    current_time = start_time
+    while current_time <= end_time:
+        output_times.append(current_time)
+
+        current_time += dt.timedelta(seconds=interval)
+
+    return output_times
+
+
+#Forcing on the mesh nodes as numpy arrays, for coupling to a model without writing .meteo files.
+#Mesh and meteo data are loaded as configured in the input file unless they are passed in.
+#Returned arrays are owned by the caller, the provider keeps no reference to them.
+#With chunk_size forcing can also be computed in chunks of nodes. Projections of a chunk are released once the chunk
+#is computed, so only interpolation operators and spatial indices, which are reused at every step, are held for all
+#nodes between steps.
+class ForcingProvider:
+    def __init__(self, input, mesh=None, meteo_data=None, input_cache=None, chunk_size=None):
+        self.input = input
+
+        if mesh is None:
+            mesh = load_mesh(input, input_cache)
+
+        if meteo_data is None:
+            meteo_data = load_meteo_data(input, input_cache)
+
+        self.mesh = mesh
+        self.meteo_data = meteo_data
+
+        #Here I assume that mesh is read in lon/lat coordinates
+        self.grid_coord_spherical = mesh.coordinates
+
+        #(start, stop, coordinates) of node chunks. Coordinate views are created once, so that interpolation operators
+        #and spatial indices cached for each chunk are reused at every step.
+        self.chunks = []
+
+        if chunk_size is not None:
+            for start in range(0, mesh.num_nodes, chunk_size):
+                stop = min(start + chunk_size, mesh.num_nodes)
+
+                self.chunks.append((start, stop, self.grid_coord_spherical[start:stop]))
+
+    @property
+    def num_nodes(self):
+        return self.mesh.num_nodes
+
+    #Returns (n_nodes, 3) array of vx, vy, p at all nodes or at the given coordinates, such as those of a chunk
+    def get_wind_data(self, time, grid_coord_spherical=None):
+        if grid_coord_spherical is None:
+            grid_coord_spherical = self.grid_coord_spherical
+
+        return self.meteo_data.get_wind_data(self.input, time, grid_coord_spherical)
+
+    #Returns wind data of a chunk, projections cached for the chunk are recomputed at every step instead of being kept
+    def get_chunk_wind_data(self, time, grid_coord_chunk):
+        wind_data = self.get_wind_data(time, grid_coord_chunk)
+
+        self.meteo_data.release(grid_coord_chunk)
+
+        return wind_data
+
+    def get_wind_stress(self, wind_data):
+        return garratt_wind_stress(wind_data, self.input.rho_air)
+
+    #Returns tau_x, tau_y, p at the given time
+    def get_forcing(self, time):
+        wind_data = self.get_wind_data(time)
+
+        wind_stress_x, wind_stress_y = self.get_wind_stress(wind_data)
+
+        return wind_stress_x, wind_stress_y, wind_data[:, 2]
+
+    #Yields (start, stop, tau_x, tau_y, p) for every chunk of nodes at the given time
+    def forcing_chunks(self, time):
+        for start, stop, grid_coord_spherical in self.chunks:
+            wind_data = self.get_chunk_wind_data(time, grid_coord_spherical)
+
+            wind_stress_x, wind_stress_y = self.get_wind_stress(wind_data)
+
+            yield start, stop, wind_stress_x, wind_stress_y, wind_data[:, 2]
+
+    #Yields (time, tau_x, tau_y, p) for every output time, by default the output times of the input file
+    def forcing_steps(self, start_time=None, end_time=None, interval=None):
+        if start_time is None:
+            start_time = self.input.start_time
+
+        if end_time is None:
+            end_time = self.input.end_time
+
+        if interval is None:
+            interval = self.input.meteo_input_frequency
+
+        for current_time in get_output_times(start_time, end_time, interval):
+            wind_stress_x, wind_stress_y, pressure = self.get_forcing(current_time)
+
+            yield current_time, wind_stress_x, wind_stress_y, pressure
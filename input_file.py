@@ -1,6 +1,7 @@
 from enum import Enum
 import yaml
 import sys
+import numpy as np
 import datetime as dt
 
 
@@ -13,6 +14,7 @@ class MeteoDataType(Enum):
     NONE = 0
     HWIND = 1
     OWIWIND = 2
+    HOLLAND = 3
 
 
 class InputFile:
@@ -20,6 +22,9 @@ class InputFile:
         with open(input_file_path) as input_file:
             input = yaml.load(input_file)
 
+        #Parsed input file, identifies the run configuration for restarts
+        self.configuration = input
+
         self.start_time = dt.datetime.strptime(input["timestepping"]["start_time"], '%d-%m-%Y %H:%M')
         self.end_time = dt.datetime.strptime(input["timestepping"]["end_time"], '%d-%m-%Y %H:%M')
         self.dt = float(input["timestepping"]["dt"])
@@ -46,6 +51,8 @@ class InputFile:
             self.meteo_data_type = MeteoDataType.HWIND
         elif input["problem"]["meteo_forcing"]["type"] == "OWIWIND":
             self.meteo_data_type = MeteoDataType.OWIWIND
+        elif input["problem"]["meteo_forcing"]["type"] == "HOLLAND":
+            self.meteo_data_type = MeteoDataType.HOLLAND
         else:
             print("Undefined meteo forcing type: {}. Exiting!".format(input["problem"]["meteo_forcing"]["type"]))
             sys.exit()
@@ -53,3 +60,74 @@ class InputFile:
         self.raw_meteo_input_file = input["problem"]["meteo_forcing"]["raw_input_file"]
         self.meteo_input_file = input["problem"]["meteo_forcing"]["input_file"]
         self.meteo_input_frequency = float(input["problem"]["meteo_forcing"]["frequency"])
+
+        #Number of digits written for output floats, by default shortest round-trip representation is used
+        self.output_precision = None
+
+        if "output" in input and "precision" in input["output"]:
+            self.output_precision = int(input["output"]["precision"])
+
+        #Node-to-partition map, if given forcing is written per partition in local node numbering
+        self.partition_file_path = None
+
+        if "output" in input and "partition_file" in input["output"]:
+            self.partition_file_path = input["output"]["partition_file"]
+
+        #Number of worker processes used to compute output steps in parallel
+        self.n_workers = 1
+
+        if "execution" in input and "n_workers" in input["execution"]:
+            self.n_workers = int(input["execution"]["n_workers"])
+
+        #Directory of the persistent cache of parsed mesh and meteo inputs, caching is disabled if not given
+        self.cache_directory = None
+
+        if "cache" in input and "directory" in input["cache"]:
+            self.cache_directory = input["cache"]["directory"]
+
+        #File the stage profiling report is written to, profiling is disabled if not given
+        self.profile_report_file = None
+
+        if "profiling" in input and "report_file" in input["profiling"]:
+            self.profile_report_file = input["profiling"]["report_file"]
+
+        #Number of finished steps buffered for a background writer thread, steps are written synchronously if 0
+        self.write_queue_size = 0
+
+        if "execution" in input and "write_queue_size" in input["execution"]:
+            self.write_queue_size = int(input["execution"]["write_queue_size"])
+
+        #Precision of meteo fields and per-step results. Mesh coordinates and distances are always double precision.
+        #In single precision interpolation weights and the Holland profile are still evaluated in double precision and
+        #rounded once when stored, time blending, ramping and stress are evaluated in single precision. Errors against
+        #the double precision result are bounded in absolute terms, about 1e-6 of the largest magnitude of a field:
+        #about 0.01 Pa for pressure, 1e-4 m/s for winds up to 100 m/s and 5e-6 Pa for stresses up to 10 Pa (measured).
+        #Relative errors of small values may be much larger, since the time blend of two snapshots can cancel.
+        self.field_dtype = np.float64
+
+        if "execution" in input and "field_precision" in input["execution"]:
+            if input["execution"]["field_precision"] == "single":
+                self.field_dtype = np.float32
+            elif input["execution"]["field_precision"] != "double":
+                print("Undefined field precision: {}. Exiting!".format(input["execution"]["field_precision"]))
+                sys.exit()
+
+        #Manifest of completed output steps, with resume only missing or corrupt steps are computed
+        self.manifest_file_path = None
+        self.resume = False
+
+        if "restart" in input and "manifest_file" in input["restart"]:
+            self.manifest_file_path = input["restart"]["manifest_file"]
+
+        if "restart" in input and "resume" in input["restart"]:
+            self.resume = bool(input["restart"]["resume"])
+
+            if self.resume and self.manifest_file_path is None:
+                print("Resuming a run requires a restart manifest file. Exiting!")
+                sys.exit()
+
+        #Number of mesh nodes processed at once, by default all nodes of a step are processed together
+        self.chunk_size = None
+
+        if "execution" in input and "chunk_size" in input["execution"]:
+            self.chunk_size = int(input["execution"]["chunk_size"])
@@ -1,36 +1,58 @@
 import sys
+import itertools
+import numpy as np
 
-from mesh.mesh_geom import (Node, Element, ElementType)
+from mesh.mesh_geom import (ElementType, MeshData)
 
+#Number of lines parsed at once, bounds the size of temporary text buffers
+CHUNK_SIZE = 1000000
 
-class AdcirMesh:
-    def __init__(self, mesh_file_path):
+
+#Parses n_lines lines of whitespace separated numbers with n_columns columns each into an array.
+#Returns None if the block does not have the expected shape.
+def parse_block(mesh_file, n_lines, n_columns, dtype):
+    block = np.empty((n_lines, n_columns), dtype=dtype)
+
+    for start in range(0, n_lines, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_lines)
+
+        chunk = np.fromstring(''.join(itertools.islice(mesh_file, stop - start)), dtype=dtype, sep=' ')
+
+        if chunk.size != (stop - start) * n_columns:
+            return None
+
+        block[start:stop] = chunk.reshape((stop - start, n_columns))
+
+    return block
+
+
+class AdcirMesh(MeshData):
+    def __init__(self, mesh_file_path, input_cache=None):
+        self.load_mesh(mesh_file_path, input_cache, "adcirc_mesh")
+
+    def parse_mesh(self, mesh_file_path):
         with open(mesh_file_path) as mesh_file:
             self.mesh_name = mesh_file.readline()
 
             num_elements, num_nodes = mesh_file.readline().split()
 
-            self.num_elements = int(num_elements)
-            self.num_nodes = int(num_nodes)
-
-            self.nodes = []
-            for node_id in range(0, self.num_nodes):
-                node_string = mesh_file.readline().split()
-
-                self.nodes.append(
-                    Node(int(node_string[0]), float(node_string[1]), float(node_string[2]), float(node_string[3])))
-
-            self.elements = []
-            for element_id in range(0, self.num_elements):
-                element_string = mesh_file.readline().split()
-
-                if int(element_string[1]) == 3:
-                    self.elements.append(
-                        Element(
-                            int(element_string[0]), ElementType.Triangle,
-                            {int(element_string[2]),
-                             int(element_string[3]),
-                             int(element_string[4])}))
-                else:
-                    print("Undefined element type: {}. Exiting!".format(element_string[1]))
-                    sys.exit()
+            num_elements = int(num_elements)
+            num_nodes = int(num_nodes)
+
+            #node_id lon/x lat/y bath
+            node_block = parse_block(mesh_file, num_nodes, 4, float)
+
+            if node_block is None:
+                print("Unable to parse nodes of mesh: {}. Exiting!".format(mesh_file_path))
+                sys.exit()
+
+            #element_id element_type node_1 node_2 node_3, only triangles are accepted
+            element_block = parse_block(mesh_file, num_elements, 5, np.int32)
+
+            if element_block is None or np.any(element_block[:, 1] != ElementType.Triangle.value):
+                print("Undefined element type in mesh: {}. Only triangles are supported. Exiting!".format(
+                    mesh_file_path))
+                sys.exit()
+
+        MeshData.__init__(self, node_block[:, 0], node_block[:, 1:3], node_block[:, 3], element_block[:, 0],
+                          element_block[:, 2:5])
@@ -1,4 +1,105 @@
-class MetaMesh:
-    def __init__(self, mesh_file_path):
+import sys
+import itertools
+import numpy as np
+
+from mesh.mesh_geom import (ElementType, MeshData)
+from mesh.ADCIRC_mesh.adcirc_mesh import (CHUNK_SIZE, parse_block)
+
+#Width of the connectivity array, elements with fewer nodes are padded with -1
+MAX_ELEMENT_NODES = max(el_type.value for el_type in ElementType)
+
+
+#Number of whitespace separated tokens on each line of text, counted on the raw characters
+def count_line_tokens(text):
+    if not text.endswith('\n'):
+        text += '\n'
+
+    chars = np.frombuffer(text.encode(), dtype=np.uint8)
+
+    is_blank = (chars == ord(' ')) | (chars == ord('\t')) | (chars == ord('\r')) | (chars == ord('\n'))
+
+    token_starts = ~is_blank
+    token_starts[1:] &= is_blank[:-1]
+
+    token_count = np.cumsum(token_starts)[chars == ord('\n')]
+
+    return np.diff(token_count, prepend=0)
+
+
+#Parses n_lines element lines "element_id element_type node_1 ... node_n" with the number of nodes given by the
+#element type. Returns (element_ids, element_types, element_nodes) or None if an element line is invalid.
+def parse_element_block(mesh_file, n_lines):
+    element_ids = np.empty(n_lines, dtype=np.int32)
+    element_types = np.empty(n_lines, dtype=np.int8)
+    element_nodes = np.full((n_lines, MAX_ELEMENT_NODES), -1, dtype=np.int32)
+
+    valid_types = np.array([el_type.value for el_type in ElementType])
+
+    for start in range(0, n_lines, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_lines)
+
+        text = ''.join(itertools.islice(mesh_file, stop - start))
+
+        line_tokens = count_line_tokens(text)
+        tokens = np.fromstring(text, dtype=np.int64, sep=' ')
+
+        if line_tokens.shape[0] != stop - start or tokens.size != line_tokens.sum():
+            return None
+
+        line_starts = np.cumsum(line_tokens) - line_tokens
+
+        chunk_types = tokens[line_starts + 1]
+
+        #element type is the number of nodes of an element
+        if np.any(~np.isin(chunk_types, valid_types)) or np.any(line_tokens != chunk_types + 2):
+            return None
+
+        element_ids[start:stop] = tokens[line_starts]
+        element_types[start:stop] = chunk_types
+
+        for node in range(0, MAX_ELEMENT_NODES):
+            has_node = chunk_types > node
+
+            element_nodes[start:stop][has_node, node] = tokens[line_starts[has_node] + 2 + node]
+
+    return element_ids, element_types, element_nodes
+
+
+#Meta mesh file:
+#mesh name
+#n_elements n_nodes
+#n_nodes lines: node_id lon/x lat/y bath
+#n_elements lines: element_id element_type node_1 ... node_n, element types may be mixed
+class MetaMesh(MeshData):
+    def __init__(self, mesh_file_path, input_cache=None):
+        self.load_mesh(mesh_file_path, input_cache, "meta_mesh")
+
+    def parse_mesh(self, mesh_file_path):
         with open(mesh_file_path) as mesh_file:
             self.mesh_name = mesh_file.readline()
+
+            num_elements, num_nodes = mesh_file.readline().split()[0:2]
+
+            num_elements = int(num_elements)
+            num_nodes = int(num_nodes)
+
+            node_block = parse_block(mesh_file, num_nodes, 4, float)
+
+            if node_block is None:
+                print("Unable to parse nodes of mesh: {}. Exiting!".format(mesh_file_path))
+                sys.exit()
+
+            element_block = parse_element_block(mesh_file, num_elements)
+
+            if element_block is None:
+                print("Unable to parse elements of mesh: {}. Supported element types: {}. Exiting!".format(
+                    mesh_file_path, ', '.join(el_type.name for el_type in ElementType)))
+                sys.exit()
+
+        element_ids, element_types, element_nodes = element_block
+
+        #Connectivity is only as wide as the largest element in the mesh
+        n_columns = element_types.max() if num_elements > 0 else ElementType.Triangle.value
+
+        MeshData.__init__(self, node_block[:, 0], node_block[:, 1:3], node_block[:, 3], element_ids,
+                          element_nodes[:, :n_columns], element_types)
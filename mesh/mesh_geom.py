@@ -1,5 +1,7 @@
 from enum import Enum
 
+import numpy as np
+
 
 class Node:
     def __init__(self, id, c1, c2, c3):
@@ -13,8 +15,117 @@ class Element:
     def __init__(self, id, el_type, nodes):
         self.id = id
         self.el_type = el_type
-        self.nodes = nodes
+        self.nodes = nodes  # node ids in mesh file order
 
 
+#Values are the number of nodes of an element
 class ElementType(Enum):
     Triangle = 3
+    Quadrilateral = 4
+
+
+#Read-only sequence that builds Node objects on access from the mesh arrays
+class NodeView:
+    def __init__(self, mesh_data):
+        self.mesh_data = mesh_data
+
+    def __len__(self):
+        return self.mesh_data.num_nodes
+
+    def __getitem__(self, node):
+        if node < 0:
+            node += len(self)
+
+        if node < 0 or node >= len(self):
+            raise IndexError("node index out of range")
+
+        return Node(int(self.mesh_data.node_ids[node]), float(self.mesh_data.coordinates[node, 0]),
+                    float(self.mesh_data.coordinates[node, 1]), float(self.mesh_data.bathymetry[node]))
+
+    def __iter__(self):
+        for node in range(0, len(self)):
+            yield self[node]
+
+
+#Read-only sequence that builds Element objects on access from the mesh arrays
+class ElementView:
+    def __init__(self, mesh_data):
+        self.mesh_data = mesh_data
+
+    def __len__(self):
+        return self.mesh_data.num_elements
+
+    def __getitem__(self, element):
+        if element < 0:
+            element += len(self)
+
+        if element < 0 or element >= len(self):
+            raise IndexError("element index out of range")
+
+        el_type = ElementType(int(self.mesh_data.element_types[element]))
+
+        return Element(int(self.mesh_data.element_ids[element]), el_type,
+                       tuple(int(node) for node in self.mesh_data.element_nodes[element, :el_type.value]))
+
+    def __iter__(self):
+        for element in range(0, len(self)):
+            yield self[element]
+
+
+#Struct-of-arrays mesh storage shared by all mesh readers.
+#Node data is kept in contiguous arrays and element connectivity in an (n_elements, max_nodes) array that preserves
+#node order. Elements with fewer nodes are padded with -1, element types default to triangles if not given.
+#Node/Element objects are only created on demand through the nodes/elements views.
+class MeshData:
+    def __init__(self, node_ids, coordinates, bathymetry, element_ids, element_nodes, element_types=None):
+        self.node_ids = np.ascontiguousarray(node_ids, dtype=np.int32)
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)  # lon/x lat/y
+        self.bathymetry = np.ascontiguousarray(bathymetry, dtype=np.float64)
+
+        self.element_ids = np.ascontiguousarray(element_ids, dtype=np.int32)
+        self.element_nodes = np.ascontiguousarray(element_nodes, dtype=np.int32)
+
+        if element_types is None:
+            element_types = np.full(self.element_ids.shape[0], ElementType.Triangle.value)
+
+        self.element_types = np.ascontiguousarray(element_types, dtype=np.int8)
+
+        self.nodes = NodeView(self)
+        self.elements = ElementView(self)
+
+    @property
+    def num_nodes(self):
+        return self.node_ids.shape[0]
+
+    @property
+    def num_elements(self):
+        return self.element_ids.shape[0]
+
+    #Parses the mesh with parse_mesh(mesh_file_path) or loads it from the input cache under cache_name
+    def load_mesh(self, mesh_file_path, input_cache, cache_name):
+        if input_cache is None:
+            self.parse_mesh(mesh_file_path)
+
+            return
+
+        cache_key = input_cache.get_key(cache_name, [mesh_file_path])
+
+        cached_mesh = input_cache.load(cache_key)
+
+        if cached_mesh is None:
+            self.parse_mesh(mesh_file_path)
+
+            cache_entry = input_cache.store(cache_key)
+
+            for array_name in ("node_ids", "coordinates", "bathymetry", "element_ids", "element_nodes",
+                               "element_types"):
+                cache_entry.add_array(array_name, getattr(self, array_name))
+
+            cache_entry.commit({"mesh_name": self.mesh_name})
+        else:
+            arrays, attributes = cached_mesh
+
+            self.mesh_name = attributes["mesh_name"]
+
+            MeshData.__init__(self, arrays["node_ids"], arrays["coordinates"], arrays["bathymetry"],
+                              arrays["element_ids"], arrays["element_nodes"], arrays.get("element_types"))
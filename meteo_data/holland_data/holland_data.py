@@ -0,0 +1,189 @@
+import sys
+import math
+import numpy as np
+import datetime as dt
+
+from utilities.utilities import haversine
+
+#Ambient pressure in mb
+P_AMBIENT = 1013.0
+
+#Ratio of surface to gradient level wind speed
+BOUNDARY_LAYER_FACTOR = 0.9
+
+#Angle (degrees) by which surface winds are turned towards the storm center, inside rmax and beyond 1.2 rmax
+INFLOW_ANGLE_INNER = 10.0
+INFLOW_ANGLE_OUTER = 20.0
+
+EARTH_ROTATION = 7.2921e-5  #rad/s
+
+KNOTS_TO_MS = 0.514444
+NAUTICAL_MILES_TO_KM = 1.852
+
+
+class TrackPoint:
+    def __init__(self, time, lon, lat, vmax, rmax, p_central):
+        self.time = time
+        self.lon = lon
+        self.lat = lat
+        self.vmax = vmax  # m/s
+        self.rmax = rmax  # km
+        self.p_central = p_central  # mb
+
+
+#ATCF coordinates are given in tenths of degrees with hemisphere, e.g. 245N or 0901W
+def parse_atcf_coordinate(coordinate):
+    value = float(coordinate[:-1]) / 10.0
+
+    return -value if coordinate[-1] in "SW" else value
+
+
+#Parametric Holland (1980) vortex evaluated analytically at all mesh points from a storm track.
+#The track is read from an ATCF (best track or forecast) file, of which time, tau, position, vmax, central pressure
+#and radius to maximum winds are used. Track parameters are interpolated linearly in time.
+#Surface winds are the gradient winds reduced to the surface, turned inwards by the inflow angle and made asymmetric
+#by adding the storm translation velocity scaled with the normalized wind speed.
+class HollandData:
+    def __init__(self, meteo_file_path, dtype=np.float64):
+        self.dtype = dtype
+
+        track = {}
+
+        with open(meteo_file_path) as meteo_input_file:
+            for line in meteo_input_file:
+                track_data = [value.strip() for value in line.split(',')]
+
+                if len(track_data) < 20:
+                    continue
+
+                time = dt.datetime.strptime(track_data[2], '%Y%m%d%H') + dt.timedelta(hours=int(track_data[5]))
+
+                #Records with wind radii of several intensities repeat the track data of the same time
+                if time in track:
+                    continue
+
+                if float(track_data[19]) <= 0.0:
+                    print("Radius to maximum winds is missing in track file {} at time {}. Exiting!".format(
+                        meteo_file_path, time))
+                    sys.exit()
+
+                track[time] = TrackPoint(time, parse_atcf_coordinate(track_data[7]),
+                                         parse_atcf_coordinate(track_data[6]),
+                                         float(track_data[8]) * KNOTS_TO_MS,
+                                         float(track_data[19]) * NAUTICAL_MILES_TO_KM, float(track_data[9]))
+
+        self.track = sorted(track.values(), key=lambda track_point: track_point.time)
+
+        if len(self.track) < 2:
+            print("Insufficient number of track points for temporal interpolation. Exiting!")
+            sys.exit()
+
+    #Returns storm parameters at time and the storm translation velocity (m/s) between the bracketing track points
+    def get_storm_parameters(self, time):
+        iter = 0
+        for track_point in self.track:
+            if track_point.time >= time:
+                break
+            iter += 1
+
+        if iter == len(self.track) or (iter == 0 and self.track[0].time != time):
+            print("Existing track points are not in time range that contains t={}. Exiting!".format(time))
+            sys.exit()
+
+        iter = max(iter, 1)
+
+        track_in = self.track[iter - 1]
+        track_ex = self.track[iter]
+
+        #Interpolation weight
+        time_range = (track_ex.time - track_in.time).total_seconds()
+        intep_w = (time - track_in.time).total_seconds() / time_range
+
+        parameters = [(1 - intep_w) * getattr(track_in, parameter) + intep_w * getattr(track_ex, parameter)
+                      for parameter in ("lon", "lat", "vmax", "rmax", "p_central")]
+
+        #Translation velocity from the displacement between the bracketing track points
+        d_x = haversine(track_in.lon, parameters[1], track_ex.lon, parameters[1]) * 1000.0
+        d_y = haversine(parameters[0], track_in.lat, parameters[0], track_ex.lat) * 1000.0
+
+        translation = (math.copysign(d_x, track_ex.lon - track_in.lon) / time_range,
+                       math.copysign(d_y, track_ex.lat - track_in.lat) / time_range)
+
+        return parameters, translation
+
+    #The vortex is evaluated analytically, so nothing is cached for mesh points
+    def release(self, grid_coord_spherical):
+        pass
+
+    def get_wind_data(self, input, time, grid_coord_spherical):
+        (storm_lon, storm_lat, vmax, rmax, p_central), (u_translation, v_translation) = self.get_storm_parameters(time)
+
+        rho_air = input.rho_air  #kg/m^3
+
+        translation_speed = math.hypot(u_translation, v_translation)
+
+        #Storm-relative maximum wind at gradient level
+        vmax_gradient = max(vmax - translation_speed, 1.0) / BOUNDARY_LAYER_FACTOR
+
+        #Weak or decaying storms may have central pressure at or above ambient, for which there is no pressure deficit
+        #and so no gradient wind, leaving the ambient pressure used as background by other meteo data and calm winds
+        p_central = min(p_central, P_AMBIENT)
+
+        d_p = (P_AMBIENT - p_central) * 100.0  #with conversion from milibars to Pa
+
+        if d_p > 0.0:
+            B = vmax_gradient**2 * rho_air * math.e / d_p
+            B = max(min(B, 2.5), 1.0)  # limit B to range [1.0,2.5]
+        else:
+            B = 1.0
+
+        #Distances in m, directions from the local east/north offsets of every point to the storm eye
+        distance = haversine(grid_coord_spherical[:, 0], grid_coord_spherical[:, 1], storm_lon, storm_lat) * 1000.0
+
+        d_x = (grid_coord_spherical[:, 0] - storm_lon) * np.cos(np.radians(storm_lat))
+        d_y = grid_coord_spherical[:, 1] - storm_lat
+
+        d_norm = np.hypot(d_x, d_y)
+
+        #At the storm eye winds vanish and the profile tends to the central pressure
+        eye = d_norm == 0.0
+        distance[eye] = 1.0
+        d_norm[eye] = 1.0
+
+        radial_x = d_x / d_norm
+        radial_y = d_y / d_norm
+
+        coriolis = 2.0 * EARTH_ROTATION * math.sin(math.radians(storm_lat))
+
+        rmax_ratio = ((rmax * 1000.0) / distance)**B
+        profile = np.exp(-rmax_ratio)
+
+        p = p_central * 100.0 + d_p * profile
+
+        half_f_r = 0.5 * distance * abs(coriolis)
+
+        wind_speed = BOUNDARY_LAYER_FACTOR * (np.sqrt(B * d_p / rho_air * rmax_ratio * profile + half_f_r**2) -
+                                              half_f_r)
+
+        wind_speed[eye] = 0.0
+        p[eye] = p_central * 100.0
+
+        #Cyclonic rotation is counterclockwise in the northern and clockwise in the southern hemisphere
+        rotation = 1.0 if storm_lat >= 0.0 else -1.0
+
+        inflow_angle = np.radians(
+            np.interp(distance, (rmax * 1000.0, 1200.0 * rmax), (INFLOW_ANGLE_INNER, INFLOW_ANGLE_OUTER)))
+
+        cos_inflow = np.cos(inflow_angle)
+        sin_inflow = np.sin(inflow_angle)
+
+        vx = wind_speed * (-rotation * cos_inflow * radial_y - sin_inflow * radial_x)
+        vy = wind_speed * (rotation * cos_inflow * radial_x - sin_inflow * radial_y)
+
+        #Translation asymmetry, largest where the rotation and storm motion are aligned
+        normalized_speed = wind_speed / (BOUNDARY_LAYER_FACTOR * vmax_gradient)
+
+        vx += u_translation * normalized_speed
+        vy += v_translation * normalized_speed
+
+        return np.column_stack((vx, vy, p)).astype(self.dtype, copy=False)
@@ -1,11 +1,12 @@
 import numpy as np
 import sys
 import math
-from scipy.interpolate import griddata
 from enum import Enum
 
 from meteo_data.hwind_data.hwind_file import HwindFile
 from utilities.utilities import haversine
+from utilities.interpolation import (barycentric_operator, QueryCache)
+from utilities.spatial_index import UniformBinGrid
 
 
 class PWRelationship(Enum):
@@ -16,13 +17,21 @@ class PWRelationship(Enum):
 
 
 class HwindData:
-    def __init__(self, meteo_file_path):
+    def __init__(self, meteo_file_path, input_cache=None, dtype=np.float64):
         with open(meteo_file_path) as meteo_input_file:
             #Skip first line
             meteo_input_file.readline()
 
             self.hwind_multiplier = float(meteo_input_file.readline())
 
+            #Velocities and pressure are stored in dtype, grid coordinates are kept in double precision
+            self.dtype = dtype
+
+            self.operator_cache = QueryCache()
+
+            #Spatial index over mesh points, built once per set of mesh points
+            self.index_cache = QueryCache(max_size=1)
+
             pw_relationship_string = meteo_input_file.readline().rstrip('\n')
 
             if pw_relationship_string == "dvorak":
@@ -55,12 +64,40 @@ class HwindData:
             self.hwind_files.sort(key=lambda hwind_file: hwind_file.time)
 
             for hwind_file in self.hwind_files:
-                hwind_file.parse_data()
+                if input_cache is not None:
+                    hwind_file.load_data(input_cache)
+                else:
+                    hwind_file.parse_data()
+
+                hwind_file.vx = hwind_file.vx.astype(dtype, copy=False)
+                hwind_file.vy = hwind_file.vy.astype(dtype, copy=False)
 
             #Visualize parsed data to check for consistency
             #for hwind_file in self.hwind_files:
             #    hwind_file.plot_data()
 
+    #Returns vx, vy of a hwind file on the mesh with the storm moved by (d_lon, d_lat).
+    #Projections are not cached, since the storm translation differs at every step between two hwind files.
+    def interpolate_hwind_file(self, hwind_file, d_lon, d_lat, grid_coord_spherical):
+        #Only mesh points inside the bounding box of the (moved) hwind grid are interpolated
+        spatial_index = self.index_cache.get(None, grid_coord_spherical, UniformBinGrid)
+
+        if d_lon == 0.0 and d_lat == 0.0:
+            operator = self.operator_cache.get(
+                hwind_file.grid_key, grid_coord_spherical,
+                lambda query_points: barycentric_operator(hwind_file.get_triangulation(), query_points, spatial_index))
+        else:
+            #Instead of moving the hwind grid to the new storm eye, mesh points are moved into the storm-centred
+            #frame of the hwind file. This way each hwind grid is triangulated only once.
+            operator = barycentric_operator(hwind_file.get_triangulation(), grid_coord_spherical, spatial_index,
+                                            (d_lon, d_lat))
+
+        return operator.apply(np.column_stack((hwind_file.vx, hwind_file.vy)), 0.0)
+
+    #Projections are not cached, operators and the spatial index of the given mesh points are kept for reuse
+    def release(self, grid_coord_spherical):
+        pass
+
     def get_wind_data(self, input, time, grid_coord_spherical):
         interpolate = False
 
@@ -83,11 +120,10 @@ class HwindData:
 
             p_central = self.hwind_files[iter].pressure_central
 
-            vx_interp = griddata(self.hwind_files[iter].spherical_grid_point_coordinates, self.hwind_files[iter].vx,
-                                 grid_coord_spherical, fill_value=0.0)
+            v_interp = self.interpolate_hwind_file(self.hwind_files[iter], 0.0, 0.0, grid_coord_spherical)
 
-            vy_interp = griddata(self.hwind_files[iter].spherical_grid_point_coordinates, self.hwind_files[iter].vy,
-                                 grid_coord_spherical, fill_value=0.0)
+            vx_interp = v_interp[:, 0]
+            vy_interp = v_interp[:, 1]
 
             vx_interp = vx_interp * curr_ramp * self.hwind_multiplier
             vy_interp = vy_interp * curr_ramp * self.hwind_multiplier
@@ -130,41 +166,26 @@ class HwindData:
 
                 p_central = self.hwind_files[iter - 1].pressure_central + intep_w * d_p_central
 
-                #Move in storm to new storm eye
-                sp_grid_pt_coord_in = np.copy(self.hwind_files[iter - 1].spherical_grid_point_coordinates)
-
+                #Storm translation of each bracketing hwind file to the new storm eye
                 d_lon_in = intep_w * d_lon
                 d_lat_in = intep_w * d_lat
 
-                sp_grid_pt_coord_in[:, 0] = sp_grid_pt_coord_in[:, 0] + d_lon_in
-                sp_grid_pt_coord_in[:, 1] = sp_grid_pt_coord_in[:, 1] + d_lat_in
-
-                #Move ex storm to new storm eye
-                sp_grid_pt_coord_ex = np.copy(self.hwind_files[iter].spherical_grid_point_coordinates)
-
                 d_lon_ex = curr_storm_lon - self.hwind_files[iter].storm_center_lon
                 d_lat_ex = curr_storm_lat - self.hwind_files[iter].storm_center_lat
 
-                sp_grid_pt_coord_ex[:, 0] = sp_grid_pt_coord_ex[:, 0] + d_lon_ex
-                sp_grid_pt_coord_ex[:, 1] = sp_grid_pt_coord_ex[:, 1] + d_lat_ex
-
                 #Intepolate in storm
-                vx_interp_in = griddata(sp_grid_pt_coord_in, self.hwind_files[iter - 1].vx, grid_coord_spherical,
-                                        fill_value=0.0)
-
-                vy_interp_in = griddata(sp_grid_pt_coord_in, self.hwind_files[iter - 1].vy, grid_coord_spherical,
-                                        fill_value=0.0)
+                v_interp_in = self.interpolate_hwind_file(self.hwind_files[iter - 1], d_lon_in, d_lat_in,
+                                                          grid_coord_spherical)
 
                 #Intepolate ex storm
-                vx_interp_ex = griddata(sp_grid_pt_coord_ex, self.hwind_files[iter].vx, grid_coord_spherical,
-                                        fill_value=0.0)
-
-                vy_interp_ex = griddata(sp_grid_pt_coord_ex, self.hwind_files[iter].vy, grid_coord_spherical,
-                                        fill_value=0.0)
+                v_interp_ex = self.interpolate_hwind_file(self.hwind_files[iter], d_lon_ex, d_lat_ex,
+                                                          grid_coord_spherical)
 
                 #Combine interpolations
-                vx_interp = (1 - intep_w) * vx_interp_in + intep_w * vx_interp_ex
-                vy_interp = (1 - intep_w) * vy_interp_in + intep_w * vy_interp_ex
+                v_interp = (1 - intep_w) * v_interp_in + intep_w * v_interp_ex
+
+                vx_interp = v_interp[:, 0]
+                vy_interp = v_interp[:, 1]
 
                 #Apply factors
                 vx_interp = vx_interp * curr_ramp * self.hwind_multiplier
@@ -185,20 +206,21 @@ class HwindData:
         B = vmax**2 * rho_air * math.e / ((1013.0 - p_central) * 100.0)  #with conversion from milibars to Pa
         B = max(min(B, 2.5), 1.0)  # limit B to range [1.0,2.5]
 
-        p = []
+        p = np.empty(grid_coord_spherical.shape[0], dtype=self.dtype)
 
-        for grid_point in grid_coord_spherical:
-            if self.pressure_wind_relationship != PWRelationship.Background:
-                distance = haversine(grid_point[0], grid_point[1], curr_storm_lon, curr_storm_lat)
+        if self.pressure_wind_relationship != PWRelationship.Background:
+            distance = haversine(grid_coord_spherical[:, 0], grid_coord_spherical[:, 1], curr_storm_lon, curr_storm_lat)
 
-                pressure = p_central + (1013.0 - p_central) * math.exp(-(rmax / distance)**B)
-            else:
-                pressure = 1013.0
+            #At the storm eye (rmax / distance)**B is unbounded and the profile tends to the central pressure
+            eye = distance == 0.0
 
-            p.append(pressure)
+            p[eye] = p_central
+            p[~eye] = p_central + (1013.0 - p_central) * np.exp(-(rmax / distance[~eye])**B)
+        else:
+            p.fill(1013.0)
 
         #Ramping pressure
-        p = 1013.0 - (1013.0 - np.asarray(p)) * curr_ramp
+        p = 1013.0 - (1013.0 - p) * curr_ramp
 
         p = p * 100.0  #convert from milibars to Pa
 
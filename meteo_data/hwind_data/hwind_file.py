@@ -3,16 +3,41 @@ import numpy as np
 import matplotlib.pyplot as plt
 import re
 import datetime as dt
+from scipy.spatial import Delaunay
 
 from utilities.utilities import haversine
 
 
+#Translation table turning "(u,v)" velocity tuples into whitespace separated values
+VELOCITY_SEPARATORS = str.maketrans('(),', '   ')
+
+
+#Reads a coordinate block: number of values followed by lines of whitespace separated values
+def read_coordinates(hwind_file):
+    n_coordinates = int(hwind_file.readline())
+
+    coordinate_lines = []
+
+    parsed_coordinates = 0
+    while parsed_coordinates < n_coordinates:
+        coordinate_lines.append(hwind_file.readline())
+
+        parsed_coordinates += len(coordinate_lines[-1].split())
+
+    return np.fromstring(''.join(coordinate_lines), sep=' ', count=n_coordinates)
+
+
 class HwindFile:
     def __init__(self, pressure_central, ramp, file_path):
         self.pressure_central = pressure_central
         self.ramp = ramp
         self.file_path = file_path
 
+        #Each hwind file defines its own grid, operators built on it are cached under this key
+        self.grid_key = file_path
+
+        self.triangulation = None
+
         time_data = re.search(r'(?P<time>[0-9]{4}_[0-9]{4}_[0-9]{4})', self.file_path)
 
         if (time_data == None):
@@ -41,82 +66,31 @@ class HwindFile:
             hwind_file.readline()
 
             #Read in grid x_coordinates
-            n_x_coordinates = int(hwind_file.readline())
-
-            x_coordinates = []
-
-            parsed_coordinates = 0
-            while parsed_coordinates < n_x_coordinates:
-                x_coord_string = hwind_file.readline().split()
-
-                for x_coord in x_coord_string:
-                    x_coordinates.append(float(x_coord))
-
-                parsed_coordinates += len(x_coord_string)
+            x_coordinates = read_coordinates(hwind_file)
 
             #Skip next line
             hwind_file.readline()
 
             #Read in grid y_coordinates
-            n_y_coordinates = int(hwind_file.readline())
-
-            y_coordinates = []
-
-            parsed_coordinates = 0
-            while parsed_coordinates < n_y_coordinates:
-                y_coord_string = hwind_file.readline().split()
-
-                for y_coord in y_coord_string:
-                    y_coordinates.append(float(y_coord))
-
-                parsed_coordinates += len(y_coord_string)
+            y_coordinates = read_coordinates(hwind_file)
 
             #Skip next line
             hwind_file.readline()
 
             #Read in grid lon_coordinates
-            n_lon_coordinates = int(hwind_file.readline())
-
-            lon_coordinates = []
-
-            parsed_coordinates = 0
-            while parsed_coordinates < n_lon_coordinates:
-                lon_coord_string = hwind_file.readline().split()
-
-                for lon_coord in lon_coord_string:
-                    lon_coordinates.append(float(lon_coord))
-
-                parsed_coordinates += len(lon_coord_string)
+            lon_coordinates = read_coordinates(hwind_file)
 
             #Skip next line
             hwind_file.readline()
 
             #Read in grid lat_coordinates
-            n_lat_coordinates = int(hwind_file.readline())
-
-            lat_coordinates = []
-
-            parsed_coordinates = 0
-            while parsed_coordinates < n_lat_coordinates:
-                lat_coord_string = hwind_file.readline().split()
-
-                for lat_coord in lat_coord_string:
-                    lat_coordinates.append(float(lat_coord))
-
-                parsed_coordinates += len(lat_coord_string)
-
-            lat_coordinates = np.asarray(lat_coordinates)
+            lat_coordinates = read_coordinates(hwind_file)
 
             #Store coordinates in arrays
             self.cartesian_coordinates = np.column_stack((x_coordinates, y_coordinates))
             self.spherical_coordinates = np.column_stack((lon_coordinates, lat_coordinates))
 
-            #Store grid point coordinates (all combinations)
-            x_grid, y_grid = np.meshgrid(self.cartesian_coordinates[:, 0], self.cartesian_coordinates[:, 1])
-            self.cartesian_grid_point_coordinates = np.column_stack((x_grid.flatten(), y_grid.flatten()))
-
-            lon_grid, lat_grid = np.meshgrid(self.spherical_coordinates[:, 0], self.spherical_coordinates[:, 1])
-            self.spherical_grid_point_coordinates = np.column_stack((lon_grid.flatten(), lat_grid.flatten()))
+            lon_grid, lat_grid = self.generate_grid_point_coordinates()
 
             #Skip next line
             hwind_file.readline()
@@ -127,31 +101,22 @@ class HwindFile:
             nx_grid = int(n_grid_string[0])
             ny_grid = int(n_grid_string[1])
 
-            vx = []
-            vy = []
+            #Velocity block consists of (u,v) tuples, which are tokenized in bulk after removing brackets and commas
+            velocities = np.fromstring(hwind_file.read().translate(VELOCITY_SEPARATORS), sep=' ',
+                                       count=2 * nx_grid * ny_grid)
 
-            for i in range(0, ny_grid):
-                temp_vx = []
-                temp_vy = []
+            if velocities.size != 2 * nx_grid * ny_grid:
+                print("Incomplete velocity data in hwind file: {}. Exiting!".format(self.file_path))
+                sys.exit()
 
-                parsed_velocities = 0
-                while parsed_velocities < nx_grid:
-                    velocities = re.finditer(r'\((?P<u>[\s\-0-9.Ee]+),(?P<v>[\s\-0-9.Ee]+)\)', hwind_file.readline())
-
-                    for velocity in velocities:
-                        temp_vx.append(float(velocity.group('u')))
-                        temp_vy.append(float(velocity.group('v')))
-                        parsed_velocities += 1
-
-                vx.append(temp_vx)
-                vy.append(temp_vy)
+            velocities = velocities.reshape((ny_grid, nx_grid, 2))
 
             #Store velocities
-            self.vx = np.asarray(vx).flatten()
-            self.vy = np.asarray(vy).flatten()
+            self.vx = velocities[:, :, 0].flatten()
+            self.vy = velocities[:, :, 1].flatten()
 
             #find vmax and rmax
-            speed = np.hypot(np.asarray(vx), np.asarray(vy))
+            speed = np.hypot(velocities[:, :, 0], velocities[:, :, 1])
             max_index = np.unravel_index(np.argmax(speed, axis=None), speed.shape)
 
             self.vmax = speed[max_index]
@@ -161,6 +126,60 @@ class HwindFile:
 
             self.rmax = haversine(self.storm_center_lon, self.storm_center_lat, lon_max, lat_max)
 
+    #Parsed data is stored in the input cache and memory mapped on later runs
+    def load_data(self, input_cache):
+        cache_key = input_cache.get_key("hwind", [self.file_path])
+
+        cached_data = input_cache.load(cache_key)
+
+        if cached_data is None:
+            self.parse_data()
+
+            cache_entry = input_cache.store(cache_key)
+
+            for array_name in ("cartesian_coordinates", "spherical_coordinates", "vx", "vy"):
+                cache_entry.add_array(array_name, getattr(self, array_name))
+
+            cache_entry.commit({
+                "dx_dy": self.dx_dy,
+                "storm_center_lon": self.storm_center_lon,
+                "storm_center_lat": self.storm_center_lat,
+                "vmax": float(self.vmax),
+                "rmax": float(self.rmax)
+            })
+        else:
+            arrays, attributes = cached_data
+
+            self.dx_dy = attributes["dx_dy"]
+            self.storm_center_lon = attributes["storm_center_lon"]
+            self.storm_center_lat = attributes["storm_center_lat"]
+            self.vmax = attributes["vmax"]
+            self.rmax = attributes["rmax"]
+
+            self.cartesian_coordinates = arrays["cartesian_coordinates"]
+            self.spherical_coordinates = arrays["spherical_coordinates"]
+            self.vx = arrays["vx"]
+            self.vy = arrays["vy"]
+
+            self.generate_grid_point_coordinates()
+
+    def generate_grid_point_coordinates(self):
+        #Store grid point coordinates (all combinations)
+        x_grid, y_grid = np.meshgrid(self.cartesian_coordinates[:, 0], self.cartesian_coordinates[:, 1])
+        self.cartesian_grid_point_coordinates = np.column_stack((x_grid.flatten(), y_grid.flatten()))
+
+        lon_grid, lat_grid = np.meshgrid(self.spherical_coordinates[:, 0], self.spherical_coordinates[:, 1])
+        self.spherical_grid_point_coordinates = np.column_stack((lon_grid.flatten(), lat_grid.flatten()))
+
+        return lon_grid, lat_grid
+
+    def get_triangulation(self):
+        #Grid is triangulated once and reused for every output step that interpolates from this file
+        if self.triangulation is None:
+            self.triangulation = Delaunay(self.spherical_grid_point_coordinates)
+
+        return self.triangulation
+
     def plot_data(self):
         nx = len(self.cartesian_coordinates[:, 0])
         ny = len(self.cartesian_coordinates[:, 1])
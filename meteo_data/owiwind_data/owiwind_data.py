@@ -2,36 +2,152 @@ import sys
 import re
 import numpy as np
 import datetime as dt
-from scipy.interpolate import griddata
+from collections import OrderedDict
 
 from meteo_data.owiwind_data.owiwind_snapshot import OWIwindSnapshot
+from utilities.interpolation import (bilinear_operator, QueryCache)
+from utilities.spatial_index import UniformBinGrid
+
+
+#Header preceding every snapshot block in OWI pressure and velocity files
+SNAPSHOT_HEADER = re.compile(
+    r'iLat=(?P<n_lat>[\s0-9]+)iLong=(?P<n_lon>[\s0-9]+)DX=(?P<d_lon>[\s0-9.Ee]+)DY=(?P<d_lat>[\s0-9.Ee]+)SWLat=(?P<o_lat>[\s\-0-9.Ee]+)SWLon=(?P<o_lon>[\s\-0-9.Ee]+)DT=(?P<time>[\s0-9]+)\n'
+)
+
+
+#OWI data blocks are written in Fortran 8F10.4 format: 8 values per line, each 10 characters wide
+VALUES_PER_LINE = 8
+FIELD_WIDTH = 10
+
+
+#Reads the raw bytes of a block of n_values data points written in the fixed-width layout.
+#Returns an array of the 10 character wide fields, or None if the block does not follow the layout.
+def read_fixed_width_fields(data_file, n_values):
+    n_full_lines, n_rest = divmod(n_values, VALUES_PER_LINE)
+
+    if n_full_lines == 0:
+        return None
+
+    first_line = data_file.readline()
+    line_end = first_line[VALUES_PER_LINE * FIELD_WIDTH:]
+
+    if line_end != b'\n' and line_end != b'\r\n':
+        return None
+
+    line_length = len(first_line)
+    block_length = n_full_lines * line_length
+
+    if n_rest > 0:
+        block_length += n_rest * FIELD_WIDTH + len(line_end)
+
+    data = first_line + data_file.read(block_length - line_length)
+
+    if len(data) != block_length or not data.endswith(line_end):
+        return None
+
+    lines = np.frombuffer(data, dtype=np.uint8, count=n_full_lines * line_length).reshape(
+        (n_full_lines, line_length))
+
+    #every full line has to end exactly after VALUES_PER_LINE fields
+    if np.any(lines[:, VALUES_PER_LINE * FIELD_WIDTH:] != np.frombuffer(line_end, dtype=np.uint8)):
+        return None
+
+    fields = np.empty(n_values, dtype='S' + str(FIELD_WIDTH))
+
+    fields[:n_full_lines * VALUES_PER_LINE] = np.ascontiguousarray(
+        lines[:, :VALUES_PER_LINE * FIELD_WIDTH]).view(fields.dtype).ravel()
+
+    fields[n_full_lines * VALUES_PER_LINE:] = np.frombuffer(data, dtype=fields.dtype, count=n_rest,
+                                                            offset=n_full_lines * line_length)
+
+    return fields
+
+
+#Moves file position past a block of n_values data points without converting them
+def skip_block(data_file, n_values):
+    start = data_file.tell()
+
+    if read_fixed_width_fields(data_file, n_values) is not None:
+        return
+
+    #Fall back to counting whitespace separated values
+    data_file.seek(start)
+
+    parsed_data_points = 0
+
+    while parsed_data_points < n_values:
+        parsed_data_points += len(data_file.readline().split())
+
+
+#Reads a block of n_values data points into an array.
+#Fixed-width blocks are converted directly from the raw bytes without creating a string per value.
+def read_block(data_file, n_values):
+    start = data_file.tell()
+
+    fields = read_fixed_width_fields(data_file, n_values)
+
+    if fields is not None:
+        return fields.astype(float)
+
+    #Fall back to whitespace separated values
+    data_file.seek(start)
+
+    parsed_data_points = []
+
+    while len(parsed_data_points) < n_values:
+        parsed_data_points.extend(data_file.readline().split())
+
+    return np.asarray(parsed_data_points, float)
 
 
 class OWIwindData:
-    def __init__(self, meteo_file_path):
+    def __init__(self, meteo_file_path, snapshot_cache_size=2, input_cache=None, dtype=np.float64):
         with open(meteo_file_path) as meteo_input_file:
             self.n_fields = int(meteo_input_file.readline().split()[0])
             self.n_skip = int(meteo_input_file.readline().split()[0])
             self.wind_multiplicator = float(meteo_input_file.readline().split()[0])
 
-            self.parse_basin_data(meteo_file_path)
+            self.operator_cache = QueryCache()
+
+            #Spatial index over mesh points, built once per set of mesh points
+            self.index_cache = QueryCache(max_size=1)
+
+            #Snapshots projected onto the mesh, only the pair bracketing the current time is kept
+            self.projection_cache = QueryCache(max_size=2)
+
+            #Snapshot fields are loaded on demand, only the most recently used ones are kept in memory
+            self.snapshot_cache_size = snapshot_cache_size
+            self.snapshot_cache = OrderedDict()
+
+            #Fields are parsed and cached on disk in double precision, snapshot fields in memory are stored in dtype
+            self.dtype = dtype
+
+            self.start_time, self.end_time, self.owiwind_snapshots = self.load_snapshots(
+                "owiwind_basin", meteo_file_path + '1', meteo_file_path + '2', input_cache)
 
             if self.n_fields == 2:
-                self.parse_regional_data(meteo_file_path)
+                self.parse_regional_data(meteo_file_path, input_cache)
+
+    def load_snapshots(self, cache_name, pressure_file_path, velocity_file_path, input_cache):
+        if input_cache is not None:
+            return self.load_cached_snapshots(cache_name, pressure_file_path, velocity_file_path, input_cache)
+        else:
+            return self.parse_snapshots(pressure_file_path, velocity_file_path)
 
-    def parse_basin_data(self, meteo_file_path):
-        with open(meteo_file_path + '1') as pressure_field_data:
-            time_data = re.search(r'.+(?P<start>[0-9]{10})\s+(?P<end>[0-9]{10})', pressure_field_data.readline())
+    #Files are only indexed here: for every snapshot the header, data file paths and byte offsets of its data blocks
+    #are stored. Returns start time, end time and the snapshots sorted by time.
+    def parse_snapshots(self, pressure_file_path, velocity_file_path):
+        with open(pressure_file_path, 'rb') as pressure_field_data:
+            time_data = re.search(r'.+(?P<start>[0-9]{10})\s+(?P<end>[0-9]{10})',
+                                  pressure_field_data.readline().decode())
 
-            self.start_time = dt.datetime.strptime(time_data.group('start'), '%Y%m%d%H')
-            self.end_time = dt.datetime.strptime(time_data.group('end'), '%Y%m%d%H')
+            start_time = dt.datetime.strptime(time_data.group('start'), '%Y%m%d%H')
+            end_time = dt.datetime.strptime(time_data.group('end'), '%Y%m%d%H')
 
-            self.owiwind_snapshots = []
+            owiwind_snapshots = []
 
             while True:
-                snap_data = re.search(
-                    r'iLat=(?P<n_lat>[\s0-9]+)iLong=(?P<n_lon>[\s0-9]+)DX=(?P<d_lon>[\s0-9.Ee]+)DY=(?P<d_lat>[\s0-9.Ee]+)SWLat=(?P<o_lat>[\s\-0-9.Ee]+)SWLon=(?P<o_lon>[\s\-0-9.Ee]+)DT=(?P<time>[\s0-9]+)\n',
-                    pressure_field_data.readline())
+                snap_data = SNAPSHOT_HEADER.search(pressure_field_data.readline().decode())
 
                 if snap_data == None:
                     break
@@ -42,31 +158,26 @@ class OWIwindData:
                                            float(snap_data.group('d_lon')), float(snap_data.group('d_lat')),
                                            int(snap_data.group('n_lon')), int(snap_data.group('n_lat')))
 
-                parsed_data_points = []
-
-                while len(parsed_data_points) < int(snap_data.group('n_lon')) * int(snap_data.group('n_lat')):
-                    parsed_data_points.extend(pressure_field_data.readline().split())
+                snapshot.pressure_file_path = pressure_file_path
+                snapshot.velocity_file_path = velocity_file_path
 
-                p = np.asarray(parsed_data_points, float)
+                snapshot.p_offset = pressure_field_data.tell()
 
-                snapshot.p = p
+                skip_block(pressure_field_data, snapshot.n_lon * snapshot.n_lat)
 
-                self.owiwind_snapshots.append(snapshot)
+                owiwind_snapshots.append(snapshot)
 
-        with open(meteo_file_path + '2') as velocity_field_data:
-            time_data = re.search(r'.+(?P<start>[0-9]{10})\s+(?P<end>[0-9]{10})', velocity_field_data.readline())
+        with open(velocity_file_path, 'rb') as velocity_field_data:
+            time_data = re.search(r'.+(?P<start>[0-9]{10})\s+(?P<end>[0-9]{10})',
+                                  velocity_field_data.readline().decode())
 
-            start_time = dt.datetime.strptime(time_data.group('start'), '%Y%m%d%H')
-            end_time = dt.datetime.strptime(time_data.group('end'), '%Y%m%d%H')
-
-            if self.start_time != start_time or self.end_time != end_time:
+            if start_time != dt.datetime.strptime(time_data.group('start'), '%Y%m%d%H') or \
+               end_time != dt.datetime.strptime(time_data.group('end'), '%Y%m%d%H'):
                 print("Velocity and pressure files have inconsistent start/end times. Exiting!")
                 sys.exit()
 
-            for owiwind_snapshot in self.owiwind_snapshots:
-                snap_data = re.search(
-                    r'iLat=(?P<n_lat>[\s0-9]+)iLong=(?P<n_lon>[\s0-9]+)DX=(?P<d_lon>[\s0-9.Ee]+)DY=(?P<d_lat>[\s0-9.Ee]+)SWLat=(?P<o_lat>[\s\-0-9.Ee]+)SWLon=(?P<o_lon>[\s\-0-9.Ee]+)DT=(?P<time>[\s0-9]+)\n',
-                    velocity_field_data.readline())
+            for owiwind_snapshot in owiwind_snapshots:
+                snap_data = SNAPSHOT_HEADER.search(velocity_field_data.readline().decode())
 
                 #each existing pressure data set has to have a corresponding velocity data set
                 if snap_data == None:
@@ -87,54 +198,165 @@ class OWIwindData:
                         int(snap_data.group('time'))))
                     sys.exit()
 
-                parsed_data_points = []
+                owiwind_snapshot.vx_offset = velocity_field_data.tell()
+
+                skip_block(velocity_field_data, owiwind_snapshot.n_lon * owiwind_snapshot.n_lat)
+
+                owiwind_snapshot.vy_offset = velocity_field_data.tell()
 
-                while len(parsed_data_points) < int(snap_data.group('n_lon')) * int(snap_data.group('n_lat')):
-                    parsed_data_points.extend(velocity_field_data.readline().split())
+                skip_block(velocity_field_data, owiwind_snapshot.n_lon * owiwind_snapshot.n_lat)
 
-                vx = np.asarray(parsed_data_points, float)
+        #Sort snapshots by time since start
+        owiwind_snapshots.sort(key=lambda owiwind_snapshot: owiwind_snapshot.time)
 
-                owiwind_snapshot.vx = vx
+        #Plot data
+        #for owiwind_snapshot in owiwind_snapshots:
+        #    owiwind_snapshot.plot_data(self.get_snapshot_fields(owiwind_snapshot))
 
-                parsed_data_points = []
+        return start_time, end_time, owiwind_snapshots
 
-                while len(parsed_data_points) < int(snap_data.group('n_lon')) * int(snap_data.group('n_lat')):
-                    parsed_data_points.extend(velocity_field_data.readline().split())
+    #Snapshots are stored in the input cache as headers plus one (n_values_total, 3) array with p, vx, vy of all
+    #snapshots. The array is memory mapped on load, hence snapshot fields are paged in by the OS when needed.
+    def load_cached_snapshots(self, cache_name, pressure_file_path, velocity_file_path, input_cache):
+        cache_key = input_cache.get_key(cache_name, [pressure_file_path, velocity_file_path])
 
-                vy = np.asarray(parsed_data_points, float)
+        cached_data = input_cache.load(cache_key)
 
-                owiwind_snapshot.vy = vy
+        if cached_data is None:
+            start_time, end_time, owiwind_snapshots = self.parse_snapshots(pressure_file_path, velocity_file_path)
 
-        #Generate grid data
-        for owiwind_snapshot in self.owiwind_snapshots:
-            lon_start = owiwind_snapshot.o_lon
-            lon_step = owiwind_snapshot.d_lon
-            lon_stop = lon_start + lon_step * owiwind_snapshot.n_lon
+            cache_entry = input_cache.store(cache_key)
 
-            lat_start = owiwind_snapshot.o_lat
-            lat_step = owiwind_snapshot.d_lat
-            lat_stop = lat_start + lat_step * owiwind_snapshot.n_lat
+            fields = cache_entry.create_array(
+                "fields", (sum(snapshot.n_lon * snapshot.n_lat for snapshot in owiwind_snapshots), 3), float)
 
-            #Store coordinates in arrays
-            owiwind_snapshot.lon_coord = np.arange(lon_start, lon_stop, lon_step, float)
-            owiwind_snapshot.lat_coord = np.arange(lat_start, lat_stop, lat_step, float)
+            field_offset = 0
+            for owiwind_snapshot in owiwind_snapshots:
+                n_values = owiwind_snapshot.n_lon * owiwind_snapshot.n_lat
 
-            #Store grid point coordinates (all combinations)
-            lon_grid, lat_grid = np.meshgrid(owiwind_snapshot.lon_coord, owiwind_snapshot.lat_coord)
-            owiwind_snapshot.spherical_grid_point_coordinates = np.column_stack((lon_grid.flatten(),
-                                                                                 lat_grid.flatten()))
+                fields[field_offset:field_offset + n_values] = self.read_snapshot_fields(owiwind_snapshot)
 
-        #Sort snapshots by time since start
-        self.owiwind_snapshots.sort(key=lambda owiwind_snapshot: owiwind_snapshot.time)
+                field_offset += n_values
 
-        #Plot data
-        #for owiwind_snapshot in self.owiwind_snapshots:
-        #    owiwind_snapshot.plot_data()
+            fields.flush()
+            del fields
+
+            cache_entry.add_array("times", np.array([snapshot.time for snapshot in owiwind_snapshots], 'datetime64[m]'))
+            cache_entry.add_array("grids", np.array([snapshot.grid_key for snapshot in owiwind_snapshots], float))
+
+            cache_entry.commit({"start_time": start_time.isoformat(), "end_time": end_time.isoformat()})
+
+            cached_data = input_cache.load(cache_key)
+
+        arrays, attributes = cached_data
+
+        owiwind_snapshots = []
+
+        field_offset = 0
+        for time, grid in zip(arrays["times"].tolist(), arrays["grids"].tolist()):
+            snapshot = OWIwindSnapshot(time, grid[0], grid[1], grid[2], grid[3], int(grid[4]), int(grid[5]))
+
+            snapshot.cached_fields = arrays["fields"]
+            snapshot.field_offset = field_offset
+
+            field_offset += snapshot.n_lon * snapshot.n_lat
+
+            owiwind_snapshots.append(snapshot)
+
+        return (dt.datetime.fromisoformat(attributes["start_time"]), dt.datetime.fromisoformat(attributes["end_time"]),
+                owiwind_snapshots)
+
+    #Returns (n_lon * n_lat, 3) array with p, vx, vy of a snapshot, reading it from disk if it is not cached
+    def get_snapshot_fields(self, owiwind_snapshot):
+        if owiwind_snapshot.cached_fields is not None:
+            return owiwind_snapshot.cached_fields[owiwind_snapshot.field_offset:owiwind_snapshot.field_offset +
+                                                  owiwind_snapshot.n_lon * owiwind_snapshot.n_lat].astype(
+                                                      self.dtype, copy=False)
+
+        if owiwind_snapshot in self.snapshot_cache:
+            self.snapshot_cache.move_to_end(owiwind_snapshot)
+
+            return self.snapshot_cache[owiwind_snapshot]
+
+        fields = self.read_snapshot_fields(owiwind_snapshot).astype(self.dtype, copy=False)
+
+        self.snapshot_cache[owiwind_snapshot] = fields
+
+        if len(self.snapshot_cache) > self.snapshot_cache_size:
+            self.snapshot_cache.popitem(last=False)
+
+        return fields
+
+    def read_snapshot_fields(self, owiwind_snapshot):
+        n_values = owiwind_snapshot.n_lon * owiwind_snapshot.n_lat
+
+        fields = np.empty((n_values, 3))
+
+        with open(owiwind_snapshot.pressure_file_path, 'rb') as pressure_field_data:
+            pressure_field_data.seek(owiwind_snapshot.p_offset)
 
-    def parse_regional_data(self, meteo_file_path):
-        #This needs to be implemented once we get hold of 223 and 224 files
-        print(meteo_file_path + '3')
-        print(meteo_file_path + '4')
+            fields[:, 0] = read_block(pressure_field_data, n_values)
+
+        with open(owiwind_snapshot.velocity_file_path, 'rb') as velocity_field_data:
+            velocity_field_data.seek(owiwind_snapshot.vx_offset)
+
+            fields[:, 1] = read_block(velocity_field_data, n_values)
+
+            velocity_field_data.seek(owiwind_snapshot.vy_offset)
+
+            fields[:, 2] = read_block(velocity_field_data, n_values)
+
+        return fields
+
+    #Regional (nested) snapshots are attached to the basin snapshots at the same time. Regional grids cover a part of
+    #the basin, mesh points inside a regional grid take regional values and all others take basin values.
+    def parse_regional_data(self, meteo_file_path, input_cache=None):
+        regional_start_time, regional_end_time, regional_snapshots = self.load_snapshots(
+            "owiwind_regional", meteo_file_path + '3', meteo_file_path + '4', input_cache)
+
+        basin_snapshots = {owiwind_snapshot.time: owiwind_snapshot for owiwind_snapshot in self.owiwind_snapshots}
+
+        for regional_snapshot in regional_snapshots:
+            if regional_snapshot.time not in basin_snapshots:
+                print("Basin data was not found for regional snapshot at time: {}. Exiting!".format(
+                    regional_snapshot.time))
+                sys.exit()
+
+            basin_snapshots[regional_snapshot.time].regional_snapshot = regional_snapshot
+
+    #Returns p, vx, vy of a snapshot on the mesh. Projections are cached, so output steps between the same pair of
+    #snapshots only blend already projected fields.
+    def interpolate_snapshot(self, owiwind_snapshot, grid_coord_spherical):
+        fields_interp = self.projection_cache.get(
+            owiwind_snapshot, grid_coord_spherical,
+            lambda query_points: self.project_snapshot(owiwind_snapshot, query_points))
+
+        return fields_interp[:, 0], fields_interp[:, 1], fields_interp[:, 2]
+
+    #OWI grids are regular lon/lat lattices, hence bilinear weights are computed directly from header values.
+    #Operators are cached by grid geometry, so the set of mesh points inside a grid is found once per geometry.
+    def get_operator(self, owiwind_snapshot, grid_coord_spherical):
+        return self.operator_cache.get(
+            owiwind_snapshot.grid_key, grid_coord_spherical, lambda query_points: bilinear_operator(
+                owiwind_snapshot.o_lon, owiwind_snapshot.o_lat, owiwind_snapshot.d_lon, owiwind_snapshot.d_lat,
+                owiwind_snapshot.n_lon, owiwind_snapshot.n_lat, query_points,
+                self.index_cache.get(None, query_points, UniformBinGrid)))
+
+    def project_snapshot(self, owiwind_snapshot, grid_coord_spherical):
+        fields_interp = self.get_operator(owiwind_snapshot, grid_coord_spherical).apply(
+            self.get_snapshot_fields(owiwind_snapshot), (1013.0, 0.0, 0.0))
+
+        regional_snapshot = owiwind_snapshot.regional_snapshot
+
+        if regional_snapshot is not None:
+            self.get_operator(regional_snapshot, grid_coord_spherical).overlay(
+                self.get_snapshot_fields(regional_snapshot), fields_interp)
+
+        return fields_interp
+
+    #Drops projections cached for the given mesh points, operators and the spatial index are kept for reuse
+    def release(self, grid_coord_spherical):
+        self.projection_cache.release(grid_coord_spherical)
 
     def get_wind_data(self, input, time, grid_coord_spherical):
         interpolate = False
@@ -148,14 +370,8 @@ class OWIwindData:
 
         if iter < len(self.owiwind_snapshots):
             #No interpolation
-            p_interp = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                self.owiwind_snapshots[iter].p, grid_coord_spherical, fill_value=1013.0)
-
-            vx_interp = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                 self.owiwind_snapshots[iter].vx, grid_coord_spherical, fill_value=0.0)
-
-            vy_interp = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                 self.owiwind_snapshots[iter].vy, grid_coord_spherical, fill_value=0.0)
+            p_interp, vx_interp, vy_interp = self.interpolate_snapshot(self.owiwind_snapshots[iter],
+                                                                       grid_coord_spherical)
         else:
             interpolate = True
 
@@ -172,24 +388,12 @@ class OWIwindData:
                 intep_w = (time - self.owiwind_snapshots[iter - 1].time) / time_range
 
                 #Intepolate in storm
-                p_interp_in = griddata(self.owiwind_snapshots[iter - 1].spherical_grid_point_coordinates,
-                                       self.owiwind_snapshots[iter - 1].p, grid_coord_spherical, fill_value=1013.0)
-
-                vx_interp_in = griddata(self.owiwind_snapshots[iter - 1].spherical_grid_point_coordinates,
-                                        self.owiwind_snapshots[iter - 1].vx, grid_coord_spherical, fill_value=0.0)
-
-                vy_interp_in = griddata(self.owiwind_snapshots[iter - 1].spherical_grid_point_coordinates,
-                                        self.owiwind_snapshots[iter - 1].vy, grid_coord_spherical, fill_value=0.0)
+                p_interp_in, vx_interp_in, vy_interp_in = self.interpolate_snapshot(self.owiwind_snapshots[iter - 1],
+                                                                                    grid_coord_spherical)
 
                 #Intepolate ex storm
-                p_interp_ex = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                       self.owiwind_snapshots[iter].p, grid_coord_spherical, fill_value=1013.0)
-
-                vx_interp_ex = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                        self.owiwind_snapshots[iter].vx, grid_coord_spherical, fill_value=0.0)
-
-                vy_interp_ex = griddata(self.owiwind_snapshots[iter].spherical_grid_point_coordinates,
-                                        self.owiwind_snapshots[iter].vy, grid_coord_spherical, fill_value=0.0)
+                p_interp_ex, vx_interp_ex, vy_interp_ex = self.interpolate_snapshot(self.owiwind_snapshots[iter],
+                                                                                    grid_coord_spherical)
 
                 #Combine interpolations
                 p_interp = (1 - intep_w) * p_interp_in + intep_w * p_interp_ex
@@ -12,26 +12,50 @@ class OWIwindSnapshot:
         self.n_lon = n_lon
         self.n_lat = n_lat
 
-    def plot_data(self):
+        #Snapshots with identical grid geometry share interpolation operators
+        self.grid_key = (o_lon, o_lat, d_lon, d_lat, n_lon, n_lat)
+
+        #Memory mapped fields from the input cache, if not set fields are read from the data files
+        self.cached_fields = None
+
+        #Regional snapshot at the same time, overrides basin values inside the regional grid
+        self.regional_snapshot = None
+
+    #Grid coordinates are generated from header values on demand instead of being stored with every snapshot
+    def get_lon_coord(self):
+        return self.o_lon + self.d_lon * np.arange(0, self.n_lon, dtype=float)
+
+    def get_lat_coord(self):
+        return self.o_lat + self.d_lat * np.arange(0, self.n_lat, dtype=float)
+
+    def plot_data(self, fields):
         nx = self.n_lon
         ny = self.n_lat
 
-        speed = np.hypot(self.vx, self.vy).reshape((ny, nx))
+        p = fields[:, 0]
+        vx = fields[:, 1]
+        vy = fields[:, 2]
+
+        lon_coord = self.get_lon_coord()
+        lat_coord = self.get_lat_coord()
+
+        speed = np.hypot(vx, vy).reshape((ny, nx))
 
         #this plots velocity field
-        #plt.streamplot(self.lon_coord, self.lat_coord, self.vx.reshape((ny, nx)),
-        #               self.vy.reshape((ny, nx)), color=speed, density=2)
+        #plt.streamplot(lon_coord, lat_coord, vx.reshape((ny, nx)),
+        #               vy.reshape((ny, nx)), color=speed, density=2)
 
         #this plots pressure field
-        plt.pcolormesh(self.spherical_grid_point_coordinates[:, 0].reshape((ny, nx)),
-                       self.spherical_grid_point_coordinates[:, 1].reshape((ny, nx)), self.p.reshape((ny, nx)))
+        lon_grid, lat_grid = np.meshgrid(lon_coord, lat_coord)
+
+        plt.pcolormesh(lon_grid, lat_grid, p.reshape((ny, nx)))
 
         plt.colorbar()
 
-        x_min = min(self.lon_coord)
-        x_max = max(self.lon_coord)
-        y_min = min(self.lat_coord)
-        y_max = max(self.lat_coord)
+        x_min = min(lon_coord)
+        x_max = max(lon_coord)
+        y_min = min(lat_coord)
+        y_max = max(lat_coord)
 
         plt.axis([x_min, x_max, y_min, y_max])
         plt.axes().set_aspect('equal')
@@ -1,18 +1,20 @@
 import sys
 import math
-import numpy as np
 import matplotlib.pyplot as plt
-import datetime as dt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from input_file import InputFile
-from input_file import MeshType
-from input_file import MeteoDataType
 
-from mesh.ADCIRC_mesh.adcirc_mesh import AdcirMesh
-from mesh.Meta_mesh.meta_mesh import MetaMesh
+from forcing_provider import (ForcingProvider, load_mesh, load_meteo_data, get_output_times)
 
-from meteo_data.hwind_data.hwind_data import HwindData
-from meteo_data.owiwind_data.owiwind_data import OWIwindData
+from output.meteo_writer import MeteoWriter
+from output.partitioned_meteo_writer import PartitionedMeteoWriter
+from output.background_writer import BackgroundWriter
+from output.restart_manifest import (RestartManifest, ManifestWriter, get_run_hash)
+
+from utilities.input_cache import InputCache
+from utilities.profiling import StageProfiler
 
 if len(sys.argv) < 2:
     print("Not enough input variables. Please provide fort.15 file path! Exiting!")
@@ -20,47 +22,146 @@ if len(sys.argv) < 2:
 
 input = InputFile(sys.argv[1])
 
-if input.mesh_type == MeshType.ADCIRC:
-    mesh = AdcirMesh(input.mesh_file_path)
-elif input.mesh_type == MeshType.Meta:
-    mesh = MetaMesh(input.mesh_file_path)
+#Profiling is enabled by the input file or by passing --profile after the input file path
+if "--profile" in sys.argv[2:] and input.profile_report_file is None:
+    input.profile_report_file = input.meteo_input_file[:-6] + "_profile.json"
+
+profiler = StageProfiler(input.profile_report_file is not None)
+
+input_cache = None
+
+if input.cache_directory is not None:
+    input_cache = InputCache(input.cache_directory)
+
+with profiler.stage("mesh load"):
+    mesh = load_mesh(input, input_cache)
 
-if input.meteo_data_type == MeteoDataType.HWIND:
-    meteo_data = HwindData(input.raw_meteo_input_file)
-elif input.meteo_data_type == MeteoDataType.OWIWIND:
-    meteo_data = OWIwindData(input.raw_meteo_input_file)
+with profiler.stage("meteo parse"):
+    meteo_data = load_meteo_data(input, input_cache)
 
 #Construct grid data from mesh in spherical coordinates
 #Here I assume that I read in mesh in lon/lat coordinates
 #That is either true or projected cartesian x/y coordinates need to be projected back to lon/lat
-grid_coord_spherical = np.zeros((mesh.num_nodes, 2))
+forcing_provider = ForcingProvider(input, mesh, meteo_data, chunk_size=input.chunk_size)
+
+meteo_writer = MeteoWriter(input.output_precision)
+
+if input.partition_file_path is not None:
+    meteo_writer = PartitionedMeteoWriter(input.partition_file_path, mesh.num_nodes, meteo_writer)
+
+restart_manifest = None
+run_hash = None
+
+if input.manifest_file_path is not None:
+    run_hash = get_run_hash(input.configuration,
+                            [input.mesh_file_path, input.raw_meteo_input_file, input.partition_file_path])
+
+    restart_manifest = RestartManifest(input.manifest_file_path, input.resume, run_hash=run_hash)
+
+
+#Chunks of a step are computed while the previous chunk is written, so only one chunk is held in memory at a time.
+#The writer consumes a chunk while the generator is suspended at yield, hence that time is recorded as write stage.
+def compute_chunks(current_time):
+    for start, stop, grid_coord_chunk in forcing_provider.chunks:
+        with profiler.stage("interpolation"):
+            wind_data = forcing_provider.get_chunk_wind_data(current_time, grid_coord_chunk)
+
+        with profiler.stage("stress"):
+            wind_stress_x, wind_stress_y = forcing_provider.get_wind_stress(wind_data)
+
+        with profiler.stage("write"):
+            yield start, stop, wind_stress_x, wind_stress_y, wind_data[:, 2]
+
+
+#Worker processes record completed steps in their own part of the manifest
+def process_steps(output_times, worker=None):
+    step_writer = meteo_writer
+
+    if restart_manifest is not None:
+        if worker is None:
+            step_manifest = restart_manifest
+        else:
+            step_manifest = RestartManifest(input.manifest_file_path, part=worker, run_hash=run_hash)
+
+        step_writer = ManifestWriter(step_writer, step_manifest)
+
+    #Writer thread is started here, so that every worker process gets its own
+    if input.write_queue_size > 0:
+        step_writer = BackgroundWriter(step_writer, input.write_queue_size)
+
+    for current_time in output_times:
+        current_step = int(math.ceil((current_time - input.start_time).total_seconds() / input.dt))
+
+        #Output file
+        output_file_name = input.meteo_input_file[:-6] + '_' + str(current_step) + ".meteo"
+
+        if input.resume and restart_manifest.is_complete(output_file_name):
+            continue
+
+        if forcing_provider.chunks:
+            with profiler.step(current_step):
+                step_writer.write_chunks(output_file_name, compute_chunks(current_time))
+
+            continue
+
+        with profiler.step(current_step):
+            with profiler.stage("interpolation"):
+                wind_data = forcing_provider.get_wind_data(current_time)
+
+            with profiler.stage("stress"):
+                wind_stress_x, wind_stress_y = forcing_provider.get_wind_stress(wind_data)
+
+            with profiler.stage("write"):
+                step_writer.write(output_file_name, wind_stress_x, wind_stress_y, wind_data[:, 2])
+
+    if input.write_queue_size > 0:
+        with profiler.stage("write flush"):
+            step_writer.close()
+
+    if restart_manifest is not None:
+        step_manifest.save()
+
+
+#Workers inherit the profiler records of this process, hence only records of their own steps are returned
+def process_steps_in_worker(output_times, worker):
+    profiler.clear()
+
+    process_steps(output_times, worker)
+
+    return profiler.to_dict()
+
+
+output_times = get_output_times(input.start_time, input.end_time, input.meteo_input_frequency)
 
-for node in range(0, mesh.num_nodes):
-    grid_coord_spherical[node][0] = mesh.nodes[node].c1
-    grid_coord_spherical[node][1] = mesh.nodes[node].c2
+n_workers = min(input.n_workers, len(output_times))
 
-current_time = input.start_time
-while current_time <= input.end_time:
-    wind_data = meteo_data.get_wind_data(input, current_time, grid_coord_spherical)
+#Workers are forked, which is not available on Windows and not safe on macOS
+if n_workers > 1 and (sys.platform == "darwin" or "fork" not in multiprocessing.get_all_start_methods()):
+    print("Forked worker processes are not supported on this platform, steps are processed serially.")
+    n_workers = 1
 
-    #Garratt's formula is used to compute wind stress from the wind velocity.
-    wind_speed = np.hypot(wind_data[:, 0], wind_data[:, 1])
-    C_d = 0.001 * (0.75 + 0.067 * wind_speed)
+if n_workers > 1:
+    #Steps are independent. Each worker gets a contiguous range of steps, so interpolation operators and loaded
+    #snapshots are reused within a worker. Workers are forked, hence mesh and meteo data are inherited from this
+    #process instead of being pickled for every task.
+    step_ranges = [output_times[i * len(output_times) // n_workers:(i + 1) * len(output_times) // n_workers]
+                   for i in range(0, n_workers)]
 
-    wind_stress_x = input.rho_air * np.multiply(C_d, np.multiply(wind_speed, wind_data[:, 0]))
-    wind_stress_y = input.rho_air * np.multiply(C_d, np.multiply(wind_speed, wind_data[:, 1]))
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('fork')) as executor:
+        results = [
+            executor.submit(process_steps_in_worker, step_range, worker)
+            for worker, step_range in enumerate(step_ranges)
+        ]
 
-    #Output file
-    current_step = int(math.ceil((current_time - input.start_time).total_seconds() / input.dt))
-    output_file_name = input.meteo_input_file[:-6] + '_' + str(current_step) + ".meteo"
-    output_file = open(output_file_name, "w")
+        for result in results:
+            profiler.merge(result.result())
+else:
+    process_steps(output_times)
 
-    for node_id in range(0, mesh.num_nodes):
-        output_file.write(str(node_id) + ' ')
-        output_file.write(str(wind_stress_x[node_id]) + ' ')
-        output_file.write(str(wind_stress_y[node_id]) + ' ')
-        output_file.write(str(wind_data[node_id, 2]) + '\n')
+if restart_manifest is not None:
+    restart_manifest.consolidate()
 
-    output_file.close()
+if profiler.enabled:
+    profiler.write_report(input.profile_report_file)
 
-    current_time += dt.timedelta(seconds=input.meteo_input_frequency)
\ No newline at end of file
+    print(profiler.format_table())
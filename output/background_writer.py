@@ -0,0 +1,83 @@
+import sys
+import queue
+import threading
+
+
+#Yields chunks until the end of a step is queued
+def queued_chunks(chunk_queue):
+    for chunk in iter(chunk_queue.get, None):
+        yield chunk
+
+    chunk_queue.finished = True
+
+
+#Writes finished steps on a background thread while the caller computes the next steps.
+#At most queue_size steps wait to be written, further writes block until the thread catches up, which bounds the
+#memory held by pending steps. Arrays passed to write must not be modified afterwards.
+#Steps written in chunks are passed to the thread chunk by chunk through a queue of the same size.
+#A failed write is reported on the next call to write or close, and then the run is stopped.
+class BackgroundWriter:
+    def __init__(self, meteo_writer, queue_size=2):
+        self.meteo_writer = meteo_writer
+        self.queue_size = queue_size
+
+        self.pending_steps = queue.Queue(maxsize=queue_size)
+        self.error = None
+
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def drain(self):
+        while True:
+            step = self.pending_steps.get()
+
+            if step is None:
+                break
+
+            write, output_file_name, data = step
+
+            #After a failure remaining steps are only taken off the queue, so the caller never blocks on a full queue
+            if self.error is None:
+                try:
+                    write(output_file_name, *data)
+                except Exception as error:
+                    self.error = (output_file_name, error)
+
+            if write == self.write_queued_chunks and not data[0].finished:
+                #Remaining chunks of a failed step
+                for chunk in iter(data[0].get, None):
+                    pass
+
+    def write_queued_chunks(self, output_file_name, chunk_queue):
+        self.meteo_writer.write_chunks(output_file_name, queued_chunks(chunk_queue))
+
+    def check_error(self):
+        if self.error is not None:
+            print("Unable to write output file: {} ({}). Exiting!".format(*self.error))
+            sys.exit()
+
+    def write(self, output_file_name, wind_stress_x, wind_stress_y, pressure):
+        self.check_error()
+
+        self.pending_steps.put((self.meteo_writer.write, output_file_name, (wind_stress_x, wind_stress_y, pressure)))
+
+    #Chunks are computed by iterating over chunks on the calling thread and written on the background thread
+    def write_chunks(self, output_file_name, chunks):
+        self.check_error()
+
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue.finished = False
+
+        self.pending_steps.put((self.write_queued_chunks, output_file_name, (chunk_queue, )))
+
+        for chunk in chunks:
+            chunk_queue.put(chunk)
+
+        chunk_queue.put(None)
+
+    #Waits until all pending steps are written
+    def close(self):
+        self.pending_steps.put(None)
+        self.thread.join()
+
+        self.check_error()
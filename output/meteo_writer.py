@@ -0,0 +1,57 @@
+import itertools
+import numpy as np
+
+#Number of nodes formatted per block, bounds the size of temporary Python objects
+BLOCK_SIZE = 100000
+
+
+#Writes per-step .meteo files with one line per node: node_id tau_x tau_y pressure
+#Columns are formatted in bulk and each file is written with a single buffered write.
+#With precision=None floats are written in shortest round-trip form, which is byte-identical to str(np.float64),
+#single precision values are written with the 9 significant digits needed to round-trip float32.
+#Otherwise they are written in scientific notation with the given number of digits after the decimal point.
+class MeteoWriter:
+    def __init__(self, precision=None):
+        self.precision = precision
+
+        if precision is None:
+            self.line_format = "%d %r %r %r\n"
+        else:
+            self.line_format = "%d {0} {0} {0}\n".format("%." + str(int(precision)) + "e")
+
+    def format(self, wind_stress_x, wind_stress_y, pressure, node_ids=None):
+        n_nodes = len(pressure)
+
+        line_format = self.line_format
+
+        if self.precision is None and pressure.dtype == np.float32:
+            line_format = "%d %.9g %.9g %.9g\n"
+
+        if node_ids is None:
+            node_ids = range(0, n_nodes)
+
+        blocks = []
+
+        for start in range(0, n_nodes, BLOCK_SIZE):
+            stop = min(start + BLOCK_SIZE, n_nodes)
+
+            values = zip(node_ids[start:stop], wind_stress_x[start:stop].tolist(), wind_stress_y[start:stop].tolist(),
+                         pressure[start:stop].tolist())
+
+            blocks.append((line_format * (stop - start)) % tuple(itertools.chain.from_iterable(values)))
+
+        return ''.join(blocks)
+
+    def get_output_files(self, output_file_name):
+        return [output_file_name]
+
+    def write(self, output_file_name, wind_stress_x, wind_stress_y, pressure, node_ids=None, mode="w"):
+        with open(output_file_name, mode) as output_file:
+            output_file.write(self.format(wind_stress_x, wind_stress_y, pressure, node_ids))
+
+    #Writes a step from (start, stop, tau_x, tau_y, p) chunks of consecutive nodes, each chunk is written as soon as it
+    #is available. Output is identical to writing the whole step at once.
+    def write_chunks(self, output_file_name, chunks):
+        with open(output_file_name, "w") as output_file:
+            for start, stop, wind_stress_x, wind_stress_y, pressure in chunks:
+                output_file.write(self.format(wind_stress_x, wind_stress_y, pressure, range(start, stop)))
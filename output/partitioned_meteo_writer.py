@@ -0,0 +1,88 @@
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+#Writes one forcing file per partition of a domain-decomposed mesh, so every rank reads only its own nodes.
+#The node-to-partition map is a METIS-style partition file with the partition id of every node on its own line.
+#Nodes of a partition are numbered locally from 0 in ascending global node order.
+#For step file <name>_<step>.meteo, partition p is written to <name>_<step>_<p>.meteo.
+class PartitionedMeteoWriter:
+    def __init__(self, partition_file_path, num_nodes, meteo_writer, n_threads=None):
+        self.meteo_writer = meteo_writer
+
+        with open(partition_file_path) as partition_file:
+            node_partitions = np.fromstring(partition_file.read(), dtype=np.int64, sep=' ')
+
+        if node_partitions.shape[0] != num_nodes or np.any(node_partitions < 0):
+            print("Partition file {} does not assign a partition to each of {} mesh nodes. Exiting!".format(
+                partition_file_path, num_nodes))
+            sys.exit()
+
+        self.n_partitions = int(node_partitions.max()) + 1
+
+        #Global node ids of each partition, in ascending order
+        sorted_nodes = np.argsort(node_partitions, kind='stable')
+        partition_start = np.searchsorted(node_partitions[sorted_nodes], np.arange(0, self.n_partitions + 1))
+
+        self.partition_nodes = [
+            sorted_nodes[partition_start[partition]:partition_start[partition + 1]]
+            for partition in range(0, self.n_partitions)
+        ]
+
+        self.n_threads = n_threads if n_threads is not None else min(self.n_partitions, 32)
+
+    def get_partition_file_name(self, output_file_name, partition):
+        return output_file_name[:-6] + '_' + str(partition) + ".meteo"
+
+    def get_output_files(self, output_file_name):
+        return [
+            self.get_partition_file_name(output_file_name, partition) for partition in range(0, self.n_partitions)
+        ]
+
+    def write_partition(self, output_file_name, partition, wind_stress_x, wind_stress_y, pressure):
+        nodes = self.partition_nodes[partition]
+
+        self.meteo_writer.write(
+            self.get_partition_file_name(output_file_name, partition), wind_stress_x[nodes], wind_stress_y[nodes],
+            pressure[nodes])
+
+    #Appends the nodes of a partition within chunk [start, stop), local node ids continue from the previous chunks
+    def write_partition_chunk(self, output_file_name, partition, mode, start, stop, wind_stress_x, wind_stress_y,
+                              pressure):
+        nodes = self.partition_nodes[partition]
+
+        local_start, local_stop = np.searchsorted(nodes, (start, stop))
+
+        chunk_nodes = nodes[local_start:local_stop] - start
+
+        self.meteo_writer.write(
+            self.get_partition_file_name(output_file_name, partition), wind_stress_x[chunk_nodes],
+            wind_stress_y[chunk_nodes], pressure[chunk_nodes], range(local_start, local_stop), mode)
+
+    def write_chunks(self, output_file_name, chunks):
+        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+            mode = "w"
+
+            for start, stop, wind_stress_x, wind_stress_y, pressure in chunks:
+                results = [
+                    executor.submit(self.write_partition_chunk, output_file_name, partition, mode, start, stop,
+                                    wind_stress_x, wind_stress_y, pressure) for partition in range(0, self.n_partitions)
+                ]
+
+                for result in results:
+                    result.result()
+
+                mode = "a"
+
+    #Partitions are written concurrently, the executor is created per step so that it is never shared by forked
+    #worker processes
+    def write(self, output_file_name, wind_stress_x, wind_stress_y, pressure):
+        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+            results = [
+                executor.submit(self.write_partition, output_file_name, partition, wind_stress_x, wind_stress_y,
+                                pressure) for partition in range(0, self.n_partitions)
+            ]
+
+            for result in results:
+                result.result()
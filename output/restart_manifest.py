@@ -0,0 +1,168 @@
+import os
+import glob
+import json
+import time
+import hashlib
+
+#Size of chunks read when computing output file checksums
+CHECKSUM_CHUNK_SIZE = 1 << 24
+
+#Minimum number of seconds between manifest saves, bounds the cost of rewriting the manifest on long runs
+SAVE_INTERVAL = 5.0
+
+
+def get_file_record(file_path):
+    checksum = hashlib.blake2b(digest_size=16)
+
+    with open(file_path, 'rb') as output_file:
+        for chunk in iter(lambda: output_file.read(CHECKSUM_CHUNK_SIZE), b''):
+            checksum.update(chunk)
+
+    return {"name": file_path, "size": os.path.getsize(file_path), "checksum": checksum.hexdigest()}
+
+
+#Input file settings that do not change output values, a run may be resumed with other values of these
+RUN_INDEPENDENT_SETTINGS = {
+    "restart": ("resume", ),
+    "execution": ("n_workers", "chunk_size", "write_queue_size"),
+    "cache": ("directory", ),
+    "profiling": ("report_file", )
+}
+
+
+#Hash of the run configuration, i.e. the parsed input file without run independent settings and the paths, sizes and
+#modification times of the input files it refers to. Steps of a run with another configuration are not resumed.
+def get_run_hash(configuration, file_paths):
+    run_hash = hashlib.blake2b(digest_size=16)
+
+    configuration = dict(configuration)
+
+    for section, keys in RUN_INDEPENDENT_SETTINGS.items():
+        if section in configuration:
+            configuration[section] = {
+                key: value
+                for key, value in configuration[section].items() if key not in keys
+            }
+
+    run_hash.update(json.dumps(configuration, sort_keys=True, default=str).encode())
+
+    for file_path in file_paths:
+        if file_path is None:
+            continue
+
+        run_hash.update(os.path.abspath(file_path).encode())
+
+        if os.path.isfile(file_path):
+            file_stat = os.stat(file_path)
+
+            run_hash.update("{} {}".format(file_stat.st_size, file_stat.st_mtime_ns).encode())
+
+    return run_hash.hexdigest()
+
+
+#Manifest of completed output steps with size and checksum of every file written for a step.
+#The manifest is saved through a temporary file and a rename, so a killed run always leaves a complete manifest.
+#Worker processes save their steps into separate part files <manifest>.part<i>, which are read together with the
+#manifest and merged into it by consolidate.
+#Manifest and part files store the hash of the run configuration, files of another configuration are ignored.
+class RestartManifest:
+    def __init__(self, manifest_file_path, resume=False, part=None, run_hash=None):
+        self.manifest_file_path = manifest_file_path
+        self.run_hash = run_hash
+
+        if part is None:
+            self.save_file_path = manifest_file_path
+        else:
+            self.save_file_path = manifest_file_path + ".part" + str(part)
+
+        self.steps = {}
+        self.last_save = 0.0
+
+        if resume:
+            self.load_parts([manifest_file_path])
+
+            #Part files of the earlier run are merged right away, since workers of this run save into the same files
+            self.consolidate()
+        elif part is None:
+            #A new run starts from an empty manifest, which is saved before any step is computed, so that steps of an
+            #earlier run are never resumed. Part files left by an earlier run are not merged into it.
+            self.save()
+
+            for file_path in self.get_part_files():
+                os.remove(file_path)
+
+    def get_part_files(self):
+        return sorted(file_path for file_path in glob.glob(self.manifest_file_path + ".part*")
+                      if ".tmp" not in file_path)
+
+    def load_parts(self, file_paths):
+        for file_path in file_paths + self.get_part_files():
+            try:
+                with open(file_path) as manifest_file:
+                    manifest = json.load(manifest_file)
+
+                if manifest.get("run_hash") != self.run_hash:
+                    print("Restart manifest file {} was written with another run configuration, its steps are "
+                          "recomputed.".format(file_path))
+                    continue
+
+                self.steps.update(manifest["steps"])
+            except (OSError, ValueError, KeyError, AttributeError):
+                continue
+
+    #A step is complete if it is recorded and all of its files still have the recorded size and checksum
+    def is_complete(self, output_file_name):
+        if output_file_name not in self.steps:
+            return False
+
+        for file_record in self.steps[output_file_name]:
+            if not os.path.isfile(file_record["name"]) or os.path.getsize(file_record["name"]) != file_record["size"]:
+                return False
+
+            if get_file_record(file_record["name"])["checksum"] != file_record["checksum"]:
+                return False
+
+        return True
+
+    def record(self, output_file_name, output_files):
+        self.steps[output_file_name] = [get_file_record(file_path) for file_path in output_files]
+
+        if time.monotonic() - self.last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        temp_file_path = self.save_file_path + ".tmp" + str(os.getpid())
+
+        with open(temp_file_path, "w") as manifest_file:
+            json.dump({"run_hash": self.run_hash, "steps": self.steps}, manifest_file)
+
+        os.replace(temp_file_path, self.save_file_path)
+
+        self.last_save = time.monotonic()
+
+    #Saves all steps, including those of worker part files, into the manifest and removes the part files
+    def consolidate(self):
+        part_files = self.get_part_files()
+
+        self.load_parts([])
+        self.save()
+
+        for file_path in part_files:
+            os.remove(file_path)
+
+
+#Records every step in the manifest once its files are written
+class ManifestWriter:
+    def __init__(self, meteo_writer, manifest):
+        self.meteo_writer = meteo_writer
+        self.manifest = manifest
+
+    def write(self, output_file_name, wind_stress_x, wind_stress_y, pressure):
+        self.meteo_writer.write(output_file_name, wind_stress_x, wind_stress_y, pressure)
+
+        self.manifest.record(output_file_name, self.meteo_writer.get_output_files(output_file_name))
+
+    def write_chunks(self, output_file_name, chunks):
+        self.meteo_writer.write_chunks(output_file_name, chunks)
+
+        self.manifest.record(output_file_name, self.meteo_writer.get_output_files(output_file_name))
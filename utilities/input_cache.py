@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+#Size of chunks read when hashing input file contents
+HASH_CHUNK_SIZE = 1 << 24
+
+#Description of a cache entry, written last so that only complete entries are ever loaded
+ENTRY_FILE_NAME = "entry.json"
+
+
+#Writes the arrays of a new cache entry into a temporary directory, which is moved into place on commit
+class CacheEntryWriter:
+    def __init__(self, entry_path):
+        self.entry_path = entry_path
+        self.temp_path = entry_path + ".tmp" + str(os.getpid())
+
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+        os.makedirs(self.temp_path)
+
+        self.array_names = []
+
+    #Returns a writable memory map, so large arrays can be filled piece by piece
+    def create_array(self, name, shape, dtype):
+        self.array_names.append(name)
+
+        return np.lib.format.open_memmap(os.path.join(self.temp_path, name + ".npy"), mode='w+', dtype=dtype,
+                                         shape=shape)
+
+    def add_array(self, name, array):
+        self.array_names.append(name)
+
+        np.save(os.path.join(self.temp_path, name + ".npy"), array)
+
+    def commit(self, attributes):
+        with open(os.path.join(self.temp_path, ENTRY_FILE_NAME), "w") as entry_file:
+            json.dump({"arrays": self.array_names, "attributes": attributes}, entry_file)
+
+        try:
+            os.rename(self.temp_path, self.entry_path)
+        except OSError:
+            #entry was committed concurrently by another run
+            shutil.rmtree(self.temp_path, ignore_errors=True)
+
+
+#On-disk cache of arrays parsed from input files.
+#Entries are keyed on the input file paths, sizes, modification times and content hashes, hence any change to
+#the inputs results in a new key. Stale entries for the same inputs are removed when a new entry is stored.
+#Arrays are stored as .npy files and loaded as read-only memory maps without copying.
+class InputCache:
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+
+        os.makedirs(cache_directory, exist_ok=True)
+
+    def get_key(self, name, file_paths):
+        path_hash = hashlib.blake2b(digest_size=8)
+        content_hash = hashlib.blake2b(digest_size=16)
+
+        for file_path in file_paths:
+            file_stat = os.stat(file_path)
+
+            path_hash.update(os.path.abspath(file_path).encode())
+
+            content_hash.update("{} {}".format(file_stat.st_size, file_stat.st_mtime_ns).encode())
+
+            with open(file_path, 'rb') as input_file:
+                for chunk in iter(lambda: input_file.read(HASH_CHUNK_SIZE), b''):
+                    content_hash.update(chunk)
+
+        return name + '_' + path_hash.hexdigest() + '_' + content_hash.hexdigest()
+
+    #Returns (arrays, attributes) of a stored entry or None if there is no valid entry for the key
+    def load(self, key):
+        entry_path = os.path.join(self.cache_directory, key)
+
+        try:
+            with open(os.path.join(entry_path, ENTRY_FILE_NAME)) as entry_file:
+                entry = json.load(entry_file)
+
+            arrays = {}
+
+            for array_name in entry["arrays"]:
+                arrays[array_name] = np.load(os.path.join(entry_path, array_name + ".npy"), mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return arrays, entry["attributes"]
+
+    def store(self, key):
+        prefix = key[:key.rfind('_') + 1]
+
+        for entry_name in os.listdir(self.cache_directory):
+            if entry_name.startswith(prefix) and entry_name != key and ".tmp" not in entry_name:
+                shutil.rmtree(os.path.join(self.cache_directory, entry_name), ignore_errors=True)
+
+        return CacheEntryWriter(os.path.join(self.cache_directory, key))
@@ -0,0 +1,170 @@
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+#Tolerance (in grid index units) used to accept points lying on the outer edges of a grid
+EDGE_TOLERANCE = 1.0e-9
+
+#Margin (in degrees) added to source bounding boxes when selecting candidate query points
+BOUNDING_BOX_MARGIN = 1.0e-6
+
+
+#Linear map from values at source points onto query points.
+#Only query points inside the source footprint (rows) have a row in the sparse (n_rows x n_source) matrix,
+#all other query points receive fill values in bulk.
+class InterpolationOperator:
+    def __init__(self, n_query, rows, matrix):
+        self.n_query = n_query
+        self.rows = rows
+        self.matrix = matrix
+
+    @property
+    def inside(self):
+        inside = np.zeros(self.n_query, dtype=bool)
+        inside[self.rows] = True
+
+        return inside
+
+    #fields is a (n_source, n_fields) array, so all fields are interpolated with one sparse product
+    def apply(self, fields, fill_values):
+        result = np.empty((self.n_query, fields.shape[1]), dtype=fields.dtype)
+
+        result[:] = fill_values
+
+        return self.overlay(fields, result)
+
+    #Replaces values of query points inside the source footprint, all other values of result are kept
+    def overlay(self, fields, result):
+        result[self.rows] = self.matrix.dot(fields)
+
+        return result
+
+
+def build_operator(n_query, n_source, rows, indices, weights):
+    n_rows = rows.shape[0]
+    n_stencil = indices.shape[0]
+
+    matrix = csr_matrix((weights.T.ravel(), indices.T.ravel(), np.arange(0, n_rows * n_stencil + 1, n_stencil)),
+                        shape=(n_rows, n_source))
+
+    return InterpolationOperator(n_query, rows, matrix)
+
+
+#Indices of query points that may lie inside the box, all points if there is no spatial index
+def select_candidates(query_points, spatial_index, lon_min, lon_max, lat_min, lat_max):
+    if spatial_index is None:
+        return np.arange(0, query_points.shape[0])
+
+    return spatial_index.query_box(lon_min - BOUNDING_BOX_MARGIN, lon_max + BOUNDING_BOX_MARGIN,
+                                   lat_min - BOUNDING_BOX_MARGIN, lat_max + BOUNDING_BOX_MARGIN)
+
+
+#Bilinear interpolation from a regular lon/lat lattice onto arbitrary points.
+#The lattice is described by its south-west corner (o_lon, o_lat), spacing (d_lon, d_lat) and
+#size (n_lon, n_lat), with values stored row by row (longitude varying fastest).
+#Cell indices and weights are computed directly from the header values, so no triangulation is needed.
+#With a spatial index only query points inside the lattice bounding box are considered.
+def bilinear_operator(o_lon, o_lat, d_lon, d_lat, n_lon, n_lat, query_points, spatial_index=None):
+    candidates = select_candidates(query_points, spatial_index, o_lon, o_lon + (n_lon - 1) * d_lon, o_lat,
+                                   o_lat + (n_lat - 1) * d_lat)
+
+    x = (query_points[candidates, 0] - o_lon) / d_lon
+    y = (query_points[candidates, 1] - o_lat) / d_lat
+
+    inside = (x >= -EDGE_TOLERANCE) & (x <= n_lon - 1 + EDGE_TOLERANCE) & \
+             (y >= -EDGE_TOLERANCE) & (y <= n_lat - 1 + EDGE_TOLERANCE)
+
+    x = x[inside]
+    y = y[inside]
+
+    #Lower-left corner of the cell containing each point
+    i = np.clip(np.floor(x).astype(np.intp), 0, max(n_lon - 2, 0))
+    j = np.clip(np.floor(y).astype(np.intp), 0, max(n_lat - 2, 0))
+
+    i_next = np.minimum(i + 1, n_lon - 1)
+    j_next = np.minimum(j + 1, n_lat - 1)
+
+    t_x = np.clip(x - i, 0.0, 1.0)
+    t_y = np.clip(y - j, 0.0, 1.0)
+
+    indices = np.stack((j * n_lon + i, j * n_lon + i_next, j_next * n_lon + i, j_next * n_lon + i_next))
+
+    weights = np.stack(((1.0 - t_x) * (1.0 - t_y), t_x * (1.0 - t_y), (1.0 - t_x) * t_y, t_x * t_y))
+
+    return build_operator(query_points.shape[0], n_lon * n_lat, candidates[inside], indices, weights)
+
+
+#Piecewise linear interpolation over a Delaunay triangulation of scattered source points.
+#This reproduces griddata(..., method='linear'), but the barycentric weights are kept for reuse and
+#the triangulation itself can be shared between query point sets.
+#Query points are moved by -shift before interpolation, i.e. the source points are moved by shift.
+#With a spatial index only query points inside the (shifted) triangulation bounding box are considered.
+def barycentric_operator(triangulation, query_points, spatial_index=None, shift=(0.0, 0.0)):
+    candidates = select_candidates(query_points, spatial_index, triangulation.min_bound[0] + shift[0],
+                                   triangulation.max_bound[0] + shift[0], triangulation.min_bound[1] + shift[1],
+                                   triangulation.max_bound[1] + shift[1])
+
+    candidate_points = query_points[candidates] - np.asarray(shift)
+
+    simplices = triangulation.find_simplex(candidate_points)
+
+    inside = simplices >= 0
+
+    simplices = simplices[inside]
+
+    transform = triangulation.transform[simplices]
+    b = np.einsum('ijk,ik->ij', transform[:, :2, :], candidate_points[inside] - transform[:, 2, :])
+
+    indices = triangulation.simplices[simplices].T
+    weights = np.vstack((b.T, 1.0 - b.sum(axis=1)))
+
+    return build_operator(query_points.shape[0], triangulation.npoints, candidates[inside], indices, weights)
+
+
+#Results computed for sets of query points, such as interpolation operators keyed by source grid geometry
+#or source fields already projected onto the query points. Results are kept separately for every query array,
+#e.g. for each chunk of mesh points, and only the max_size most recently used results of an array are kept.
+#Results of a query array are dropped when the array itself is garbage collected or when it is released.
+class QueryCache:
+    def __init__(self, max_size=8):
+        self.max_size = max_size
+        self.query_results = {}
+
+        #Finalizers dropping results of query arrays when they are garbage collected
+        self.finalizers = {}
+
+    def get(self, key, query_points, builder):
+        query_id = id(query_points)
+
+        if query_id not in self.query_results:
+            self.query_results[query_id] = OrderedDict()
+
+            self.finalizers[query_id] = weakref.finalize(query_points, self.drop, query_id)
+
+        results = self.query_results[query_id]
+
+        if key in results:
+            results.move_to_end(key)
+        else:
+            results[key] = builder(query_points)
+
+            if len(results) > self.max_size:
+                results.popitem(last=False)
+
+        return results[key]
+
+    def drop(self, query_id):
+        self.query_results.pop(query_id, None)
+        self.finalizers.pop(query_id, None)
+
+    #Drops all results of a query array, e.g. of a chunk whose results should not be held between steps.
+    #The finalizer of the array is detached, so arrays released at every step do not accumulate finalizers.
+    def release(self, query_points):
+        finalizer = self.finalizers.get(id(query_points))
+
+        if finalizer is not None:
+            finalizer.detach()
+
+        self.drop(id(query_points))
@@ -0,0 +1,171 @@
+import sys
+import time
+import json
+from contextlib import contextmanager, nullcontext
+
+#resource is not available on Windows, where only wall times are profiled and memory is reported as 0
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#Returned by stage/step of a disabled profiler, so instrumented code only pays for one attribute lookup and call
+NULL_CONTEXT = nullcontext()
+
+PAGE_SIZE = resource.getpagesize() if resource is not None else 4096
+
+
+#High-water mark of the resident set size in bytes, ru_maxrss is in kilobytes on Linux and in bytes on macOS
+def get_max_rss():
+    if resource is None:
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+#Current resident set size in bytes, where /proc is not available the high-water mark is used instead
+def get_rss():
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return get_max_rss()
+
+
+class StageRecord:
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.peak_memory = 0
+
+    def add(self, wall_time, peak_memory):
+        self.calls += 1
+        self.wall_time += wall_time
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+    def to_dict(self):
+        return {"calls": self.calls, "wall_time": self.wall_time, "peak_memory": self.peak_memory}
+
+
+#Records wall time, call counts and peak memory of named stages and of output steps.
+#Peak memory is the growth of the resident set size over the size when the stage starts. It is sampled at stage
+#boundaries, so allocations are not traced and timings are not distorted. If the high-water mark of the process rose
+#during a stage, the stage reached it, otherwise the peak is the size at the end of the stage. Short-lived
+#allocations below an earlier high-water mark are therefore not seen. Stages may be nested, peaks of inner stages
+#are accounted to the enclosing stages as well. A disabled profiler records nothing.
+class StageProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+
+        self.stages = {}
+        self.steps = []
+
+        self.open_frames = []
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_CONTEXT
+
+        return self.record(name, None)
+
+    def step(self, step):
+        if not self.enabled:
+            return NULL_CONTEXT
+
+        return self.record(None, step)
+
+    @contextmanager
+    def record(self, name, step):
+        current_memory = get_rss()
+        max_memory = get_max_rss()
+
+        for frame in self.open_frames:
+            frame["peak"] = max(frame["peak"], current_memory)
+
+        frame = {"start_memory": current_memory, "peak": current_memory, "stages": {}}
+        self.open_frames.append(frame)
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+
+            frame["peak"] = max(frame["peak"], get_rss())
+
+            end_max_memory = get_max_rss()
+
+            if end_max_memory > max_memory:
+                frame["peak"] = max(frame["peak"], end_max_memory)
+
+            self.open_frames.pop()
+
+            if self.open_frames:
+                self.open_frames[-1]["peak"] = max(self.open_frames[-1]["peak"], frame["peak"])
+
+            peak_memory = frame["peak"] - frame["start_memory"]
+
+            if step is None:
+                self.stages.setdefault(name, StageRecord()).add(wall_time, peak_memory)
+
+                #Stage times are also collected per enclosing step
+                for open_frame in self.open_frames:
+                    open_frame["stages"][name] = open_frame["stages"].get(name, 0.0) + wall_time
+            else:
+                self.steps.append({
+                    "step": step,
+                    "wall_time": wall_time,
+                    "peak_memory": peak_memory,
+                    "stages": frame["stages"]
+                })
+
+    def clear(self):
+        self.stages = {}
+        self.steps = []
+
+    def to_dict(self):
+        return {
+            "stages": {name: record.to_dict() for name, record in self.stages.items()},
+            "steps": self.steps
+        }
+
+    #Adds records of another profiler, e.g. the to_dict() result of a profiler in a worker process
+    def merge(self, profile):
+        for name, stage in profile["stages"].items():
+            record = self.stages.setdefault(name, StageRecord())
+
+            record.calls += stage["calls"]
+            record.wall_time += stage["wall_time"]
+            record.peak_memory = max(record.peak_memory, stage["peak_memory"])
+
+        self.steps.extend(profile["steps"])
+
+    def write_report(self, report_file_path):
+        profile = self.to_dict()
+
+        profile["steps"].sort(key=lambda step: step["step"])
+
+        profile["max_rss"] = get_max_rss()
+
+        with open(report_file_path, "w") as report_file:
+            json.dump(profile, report_file, indent=2)
+
+    def format_table(self):
+        lines = ["{:<20}{:>8}{:>14}{:>14}{:>16}".format("stage", "calls", "total [s]", "per call [s]", "peak [MB]")]
+
+        for name, record in self.stages.items():
+            lines.append("{:<20}{:>8d}{:>14.4f}{:>14.6f}{:>16.2f}".format(name, record.calls, record.wall_time,
+                                                                         record.wall_time / record.calls,
+                                                                         record.peak_memory / 1.0e6))
+
+        if self.steps:
+            step_times = [step["wall_time"] for step in self.steps]
+
+            lines.append("{} steps: mean {:.6f} s, min {:.6f} s, max {:.6f} s, peak {:.2f} MB".format(
+                len(self.steps), sum(step_times) / len(step_times), min(step_times), max(step_times),
+                max(step["peak_memory"] for step in self.steps) / 1.0e6))
+
+        return '\n'.join(lines)
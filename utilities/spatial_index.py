@@ -0,0 +1,57 @@
+import numpy as np
+
+
+#Uniform grid of bins over a fixed set of points (e.g. mesh nodes), built once and used to select the points
+#inside a bounding box without testing every point.
+#Point indices are stored sorted by bin, so the points of consecutive bins in a row are contiguous.
+class UniformBinGrid:
+    def __init__(self, points, points_per_bin=64):
+        self.points = points
+
+        self.lon_min, self.lat_min = points.min(axis=0)
+        self.lon_max, self.lat_max = points.max(axis=0)
+
+        extent_lon = max(self.lon_max - self.lon_min, np.finfo(float).eps)
+        extent_lat = max(self.lat_max - self.lat_min, np.finfo(float).eps)
+
+        #Bins are roughly square with about points_per_bin points on average
+        n_bins = max(points.shape[0] // points_per_bin, 1)
+
+        self.n_lon = int(min(max(round(np.sqrt(n_bins * extent_lon / extent_lat)), 1), n_bins))
+        self.n_lat = max(n_bins // self.n_lon, 1)
+
+        self.d_lon = extent_lon / self.n_lon
+        self.d_lat = extent_lat / self.n_lat
+
+        bins = self.get_bin_index(points[:, 1], self.lat_min, self.d_lat, self.n_lat) * self.n_lon + \
+               self.get_bin_index(points[:, 0], self.lon_min, self.d_lon, self.n_lon)
+
+        self.sorted_points = np.argsort(bins, kind='stable')
+
+        self.bin_start = np.zeros(self.n_lon * self.n_lat + 1, dtype=np.intp)
+        self.bin_start[1:] = np.cumsum(np.bincount(bins, minlength=self.n_lon * self.n_lat))
+
+    @staticmethod
+    def get_bin_index(coordinate, origin, spacing, n_bins):
+        return np.clip(np.floor((coordinate - origin) / spacing).astype(np.intp), 0, n_bins - 1)
+
+    #Returns indices of points inside [lon_min, lon_max] x [lat_min, lat_max].
+    #Indices are ordered by bin, so consecutive points are close to each other, which speeds up point location.
+    def query_box(self, lon_min, lon_max, lat_min, lat_max):
+        if lon_min > self.lon_max or lon_max < self.lon_min or lat_min > self.lat_max or lat_max < self.lat_min:
+            return np.empty(0, dtype=np.intp)
+
+        i_min, i_max = self.get_bin_index(np.array([lon_min, lon_max]), self.lon_min, self.d_lon, self.n_lon)
+        j_min, j_max = self.get_bin_index(np.array([lat_min, lat_max]), self.lat_min, self.d_lat, self.n_lat)
+
+        candidates = np.concatenate([
+            self.sorted_points[self.bin_start[j * self.n_lon + i_min]:self.bin_start[j * self.n_lon + i_max + 1]]
+            for j in range(j_min, j_max + 1)
+        ])
+
+        candidate_points = self.points[candidates]
+
+        inside = (candidate_points[:, 0] >= lon_min) & (candidate_points[:, 0] <= lon_max) & \
+                 (candidate_points[:, 1] >= lat_min) & (candidate_points[:, 1] <= lat_max)
+
+        return candidates[inside]
@@ -1,16 +1,29 @@
-import math
+import numpy as np
 
 
 #calculates distance on between two points on sphere
+#works with scalars as well as numpy arrays of coordinates (e.g. all mesh nodes against the storm eye)
 def haversine(lon1, lat1, lon2, lat2):
     R = 6372.8
 
-    dLat = math.radians(lat2 - lat1)
-    dLon = math.radians(lon2 - lon1)
-    lat1 = math.radians(lat1)
-    lat2 = math.radians(lat2)
+    dLat = np.radians(lat2 - lat1)
+    dLon = np.radians(lon2 - lon1)
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
 
-    a = math.sin(dLat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dLon / 2)**2
-    c = 2 * math.asin(math.sqrt(a))
+    a = np.sin(dLat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dLon / 2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
 
     return R * c
+
+
+#Garratt's formula is used to compute wind stress from the wind velocity.
+#wind_data holds vx, vy in the first two columns, returns wind stress x and y components
+def garratt_wind_stress(wind_data, rho_air):
+    wind_speed = np.hypot(wind_data[:, 0], wind_data[:, 1])
+    C_d = 0.001 * (0.75 + 0.067 * wind_speed)
+
+    wind_stress_x = rho_air * np.multiply(C_d, np.multiply(wind_speed, wind_data[:, 0]))
+    wind_stress_y = rho_air * np.multiply(C_d, np.multiply(wind_speed, wind_data[:, 1]))
+
+    return wind_stress_x, wind_stress_y